@@ -1,6 +1,11 @@
+import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
-from link_extract import extract_links_by_text, extract_chapter, copy_pdf_list
+from link_extract import group_by_chapter, copy_pdf_list, extract_task_pdfs
+from link_index import get_link_index
+from task_index import get_task_index
+from package_store import get_package_store, SHARED_SESSION
 from langchain_core.messages import HumanMessage, AIMessage
 
 
@@ -25,31 +30,109 @@ gradient_text_html = """
 """
 
 
-def find_pdf_from_task_numbers(task_numbers: list):
-    """ Find PDF files from a list of task numbers."""
+def find_pdf_for_chapter(tasks_chapter: str, task_numbers: list, destination_dir: str) -> dict:
+    """
+    Finds and copies the PDF files of tasks that all belong to ONE chapter
+    into `destination_dir`.
 
-    # Extraction of chapter number to put in the search path
-    tasks_chapter = extract_chapter(task_numbers)
+    Task numbers with a known page range get a slim PDF with only their pages
+    ("extracted": {source: slim PDF}); pageblocks and tasks without page info
+    get the whole file. "tasks": {source: [requested tasks]}.
+    """
 
-    # Extraction of the links in pdf TOC chapter files associated with the text of tasks in task_num list
-    matches = extract_links_by_text(f"PDF/025-MPP1285_{tasks_chapter}-TOC.PDF", task_numbers)
+    # Links of the tasks in the chapter TOC (prebuilt link index, no PDF parsing)
+    resolved = get_link_index().resolve(tasks_chapter, task_numbers)
 
-    # Copy selected PDF files from MPP original directory to single working directory (AMM_EXTRACTED)
+    # The TOC has no /F link for CONFIG-n entries (e.g. 21-20-00-100-801-A):
+    # their files come from the task index instead
+    task_index = get_task_index()
+    for task, targets in resolved.items():
+        if not targets:
+            resolved[task] = list(dict.fromkeys(entry["pdf"] for entry in task_index.lookup(task) if entry["pdf"]))
+
+    # Page ranges of the requested tasks inside each linked file (None = whole file)
+    page_ranges = {}
+    for task, targets in resolved.items():
+        ranges = task_index.page_ranges(task)
+        for target in targets:
+            if target in ranges and page_ranges.get(target, []) is not None:
+                page_ranges.setdefault(target, []).append(ranges[target])
+            else:
+                page_ranges[target] = None
+
+    base_dir = "/Users/fernandocuriel/PycharmProjects/RAG/PDF"
+
+    # Copy selected PDF files from MPP original directory to the session package (AMM_EXTRACTED/<session>/<chapter>)
     result = copy_pdf_list(
-        matches,
-        destination_dir="/Users/fernandocuriel/PycharmProjects/RAG/PDF/AMM_EXTRACTED/" + f"{tasks_chapter}",
-        base_dir="/Users/fernandocuriel/PycharmProjects/RAG/PDF"
+        [target for target, ranges in page_ranges.items() if ranges is None],
+        destination_dir=destination_dir,
+        base_dir=base_dir
     )
+    # ...and write only the task pages of the others
+    slim = extract_task_pdfs(
+        {target: ranges for target, ranges in page_ranges.items() if ranges is not None},
+        destination_dir=destination_dir,
+        base_dir=base_dir
+    )
+    for key in ("copied", "missing"):
+        result[key].extend(slim[key])
+    result["delivery"].update(slim["delivery"])
+    result["extracted"] = slim["extracted"]
+
+    # Requested tasks of every delivered file (for the work package index)
+    result["tasks"] = {}
+    for task, targets in resolved.items():
+        for target in targets:
+            result["tasks"].setdefault(os.path.abspath(os.path.join(base_dir, target)), []).append(task)
+
+    # Tasks neither linked in the chapter TOC nor in the task index
+    result["not_found"] = [task for task, targets in resolved.items() if not targets]
+    # Delivered files inside destination_dir
+    result["files"] = [result["extracted"].get(src) or os.path.join(destination_dir, os.path.basename(src))
+                       for src in result["copied"]]
+    return result
 
-    print(f"Copied in ../AMM_EXTRACTED/{tasks_chapter}")
-    print()
-    for f in result["copied"]:
-        print("  ✓", f)
-
-    print("\nMissing:")
-    for f in result["missing"]:
-        print("  ✗", f)
 
+def find_pdf_from_task_numbers(task_numbers: list, session_id: str = SHARED_SESSION):
+    """
+    Find PDF files from a list of task numbers.
+
+    Tasks are grouped by ATA chapter and every chapter is resolved in parallel
+    against its own TOC. Files go to the package folder of `session_id`
+    (user or Streamlit session), which is recorded in the package manifest. Returns the merged "copied"/"missing"/"not_found"
+    lists, the merged "extracted" slim PDFs and
+    "chapters": {chapter: {"copied", "missing", "not_found", "extracted"}}.
+    """
+    groups = group_by_chapter(task_numbers)
+    store = get_package_store()
+
+    def find_chapter(chapter):
+        return find_pdf_for_chapter(chapter, groups[chapter], store.package_dir(session_id, chapter))
+
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as pool:
+        results = dict(zip(groups, pool.map(find_chapter, groups)))
+
+    result = {"copied": [], "missing": [], "not_found": [], "extracted": {}, "chapters": results}
+    for tasks_chapter, chapter_result in results.items():
+        for key in ("copied", "missing", "not_found"):
+            result[key].extend(chapter_result[key])
+        result["extracted"].update(chapter_result["extracted"])
+
+        print(f"Copied in {store.package_dir(session_id, tasks_chapter)}")
+        print()
+        for f in chapter_result["copied"]:
+            if f in chapter_result["extracted"]:
+                print("  ✓", f, "->", os.path.basename(chapter_result["extracted"][f]))
+            else:
+                print("  ✓", f)
+
+        print("\nMissing:")
+        for f in chapter_result["missing"]:
+            print("  ✗", f)
+        for task in chapter_result["not_found"]:
+            print("  ✗ (no TOC link)", task)
+
+    store.record(session_id, [f for chapter_result in results.values() for f in chapter_result["files"]])
     return result
 
 
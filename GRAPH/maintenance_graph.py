@@ -0,0 +1,93 @@
+# Fixed-edge LangGraph pipeline for routed queries: diagnose -> select component -> find_tasks (direct return)
+import uuid
+import operator
+from typing import TypedDict, Annotated
+
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.graph import StateGraph, START, END
+
+from agent_steps import lookup_tasks, diagnose_symptoms, chunk_text
+from page_search import get_page_search, format_search_results
+from prompts.tech_prompts import select_component_prompt
+
+
+# PipelineState object
+class PipelineState(TypedDict):
+    query: str
+    route: str                  # first tool: "symptoms_rag", "find_tasks" or "search_manual"
+    argument: str               # input of the first tool (query_router.RouteDecision.argument)
+    session_id: str
+    thread_id: str              # key of the work packages built by the run
+    diagnosis: str
+    component: str
+    messages: Annotated[list, operator.add]
+
+
+def tool_messages(name: str, args: dict, content: str) -> list:
+    """ Tool call and result recorded as if the agent had made them (history and UI)."""
+    call_id = f"call_{uuid.uuid4().hex[:24]}"
+    return [AIMessage("", tool_calls=[{"name": name, "args": args, "id": call_id}]),
+            ToolMessage(content, name=name, tool_call_id=call_id)]
+
+
+def build_maintenance_pipeline(model):
+    """
+    Compiles the strict SYSTEM_PROMPT workflow as fixed edges:
+
+        START -> diagnose -> select_component -> find_tasks -> END
+        START -> find_tasks -> END
+        START -> search_manual -> END
+
+    Only select_component asks the agent model; find_tasks and search_manual
+    are terminal nodes whose output is the answer (no echo turn).
+    """
+
+    def diagnose(state: PipelineState) -> dict:
+        print("Diagnostics RAG step. Thinking...")
+        diagnosis = diagnose_symptoms(state["query"])
+        return {"diagnosis": diagnosis,
+                "messages": tool_messages("symptoms_rag", {"symptoms_user": state["query"]}, diagnosis)}
+
+    def select_component(state: PipelineState) -> dict:
+        response = model.invoke(select_component_prompt(state["diagnosis"]))
+        lines = [line.strip().strip('"') for line in chunk_text(response).splitlines() if line.strip()]
+        # Empty answer: look up tasks for the symptoms themselves
+        component = lines[0] if lines else state["query"]
+        print(f"Component selected: {component}")
+        return {"component": component}
+
+    def find_tasks(state: PipelineState) -> dict:
+        print("\nSearch Tasks RAG step. Thinking...\n")
+        components = state.get("component") or state["argument"]
+        answer = lookup_tasks(components, state["session_id"], state["thread_id"], state.get("diagnosis") or None)
+        return {"messages": tool_messages("find_tasks", {"components": components}, answer) + [AIMessage(answer)]}
+
+    def search_manual(state: PipelineState) -> dict:
+        print("\nSearch Manual step.\n")
+        answer = format_search_results(get_page_search().search(state["argument"], limit=10))
+        return {"messages": tool_messages("search_manual", {"text": state["argument"]}, answer) + [AIMessage(answer)]}
+
+    # Graph elements structuring
+    graph = StateGraph(PipelineState)
+    graph.add_node("diagnose", diagnose)
+    graph.add_node("select_component", select_component)
+    graph.add_node("find_tasks", find_tasks)
+    graph.add_node("search_manual", search_manual)
+
+    graph.add_conditional_edges(START, lambda state: state["route"],
+                                {"symptoms_rag": "diagnose", "find_tasks": "find_tasks",
+                                 "search_manual": "search_manual"})
+    graph.add_edge("diagnose", "select_component")
+    graph.add_edge("select_component", "find_tasks")
+    graph.add_edge("find_tasks", END)
+    graph.add_edge("search_manual", END)
+    return graph.compile()
+
+
+#-------------------
+# Usage (from the project root: python -m GRAPH.maintenance_graph)
+#---------------
+if __name__ == "__main__":
+    from agent_factory import get_maintenance_agent
+    pipeline = get_maintenance_agent().pipeline
+    print(pipeline.get_graph().draw_ascii())      # Visualize graph
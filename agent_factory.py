@@ -0,0 +1,194 @@
+# Maintenance agent: tools, model clients and compiled graph built once per process
+import os
+import time
+import uuid
+import threading
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+# Langchain libraries & Tools
+from langchain.tools import tool, ToolRuntime
+from langchain_openai import ChatOpenAI
+from langchain.agents import create_agent
+from langchain_core.messages import AIMessageChunk, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+# Self-made libraries, prompts and Auxiliary Functions
+from agent_steps import lookup_tasks, diagnose_symptoms, chunk_text, pop_work_packages
+from prompts.tech_prompts import SYSTEM_PROMPT
+from package_store import SHARED_SESSION
+from page_search import get_page_search, format_search_results
+from query_router import get_query_router, log_route
+from GRAPH.maintenance_graph import build_maintenance_pipeline
+
+load_dotenv()
+API_KEY = os.getenv("OPENAI_API_KEY")
+
+
+# --------------------------
+# Context Schema (per request)
+# --------------------------
+@dataclass
+class Context:
+    user_id: str
+    session_id: str = SHARED_SESSION     # package folder in AMM_EXTRACTED
+
+
+# --------------------------
+# RAG LLM Tools
+#---------------------------
+
+# Find tasks (RAG tool)
+@tool
+def find_tasks(components: str, runtime: ToolRuntime[Context]) -> str:
+    """ finds tasks for systems or components responsible for the failure."""
+    print("\nSearch Tasks RAG tool chosen. Thinking...\n")
+    return lookup_tasks(components, runtime.context.session_id, runtime.config["configurable"]["thread_id"])
+
+
+# Symptoms diagnostic (RAG tool)
+@tool
+def symptoms_rag(symptoms_user: str) -> str:
+    """
+    Use the symptoms_user to determine the most likely cause of the problem.
+    """
+    print("Diagnostics RAG tool chosen. Thinking...")
+    return diagnose_symptoms(symptoms_user)
+
+
+# Exact text search (FTS5 page index, no embeddings)
+@tool
+def search_manual(text: str) -> str:
+    """ finds the manual pages containing exact part numbers, placards, error messages or phrases."""
+    print("\nSearch Manual tool chosen.\n")
+    return format_search_results(get_page_search().search(text, limit=10))
+
+
+TOOLS = [find_tasks, symptoms_rag, search_manual]
+# Tools that end the run (SYSTEM_PROMPT stop condition): the agent's last turn only echoes their output
+TERMINAL_TOOLS = ("find_tasks", "search_manual")
+
+
+# --------------------------
+# Agent factory
+# --------------------------
+class MaintenanceAgent:
+    """
+    The compiled agent graph, its model client and checkpointer, built once.
+    Every query runs on a fresh thread_id with its own Context, so sessions
+    share the graph but never their conversation state.
+    """
+
+    def __init__(self):
+        # AI Model parameter definition
+        self.model = ChatOpenAI(
+            api_key=API_KEY,
+            temperature=0,
+            model="gpt-5-mini",
+            reasoning_effort="low"
+        )
+        # MEMORY (one thread per query, dropped once its history has been read)
+        self.checkpointer = InMemorySaver()
+        # AGENT CREATION
+        self.agent = create_agent(
+            model=self.model,
+            system_prompt=SYSTEM_PROMPT,
+            tools=TOOLS,
+            context_schema=Context,
+            checkpointer=self.checkpointer
+        )
+        # Fixed-edge pipeline for the queries routed locally (same tools, no routing or echo turns)
+        self.pipeline = build_maintenance_pipeline(self.model)
+
+    def stream(self, maintenance_query: str, user_id: str, session_id: str = SHARED_SESSION):
+        """
+        Runs one query and yields (kind, payload) as soon as things happen:
+            ("tool_call", tool name)          a tool was picked
+            ("token", text)                   a piece of model output (agent or RAG model inside a tool)
+            ("tool_result", (name, content))  a tool finished
+            ("done", (messages, work_packages))
+        Clear-cut queries (local pre-router) run on the fixed-edge pipeline, the rest on the agent.
+        """
+        thread_id = uuid.uuid4().hex
+        route = get_query_router().route(maintenance_query)
+        llm_tool, llm_route_ms = None, None
+        try:
+            if route.confident:
+                print(f"Pre-router: {route.tool} ({route.method}, confidence {route.confidence:.2f})")
+                yield "tool_call", route.tool
+                messages = [HumanMessage(maintenance_query)]
+                state = {"query": maintenance_query, "route": route.tool, "argument": route.argument,
+                         "session_id": session_id, "thread_id": thread_id, "diagnosis": "", "component": "", "messages": messages}
+                for mode, data in self.pipeline.stream(state, stream_mode=["messages", "updates"]):
+                    if mode == "messages":
+                        chunk, metadata = data
+                        if isinstance(chunk, AIMessageChunk) and metadata.get("langgraph_node") != "select_component":
+                            text = chunk_text(chunk)
+                            if text:
+                                yield "token", text
+                    else:
+                        for update in data.values():
+                            if (update or {}).get("component"):
+                                yield "tool_call", "find_tasks"
+                            for message in (update or {}).get("messages", []):
+                                messages = messages + [message]
+                                if isinstance(message, ToolMessage):
+                                    yield "tool_result", (message.name, message.content)
+            else:
+                config = {"configurable": {"thread_id": thread_id}}
+                start = time.perf_counter()
+                terminal_done = False
+                for mode, data in self.agent.stream(
+                        {"messages": [{"role": "user", "content": maintenance_query}]},
+                        config=config,
+                        context=Context(user_id=str(user_id), session_id=session_id),
+                        stream_mode=["messages", "updates"]):
+                    if mode == "messages":
+                        chunk, metadata = data
+                        if not isinstance(chunk, AIMessageChunk):
+                            continue
+                        if terminal_done and metadata.get("langgraph_node") == "model":
+                            continue    # echo of the terminal tool's output, already shown
+                        for tool_call in chunk.tool_call_chunks:
+                            if tool_call.get("name"):
+                                if llm_tool is None:
+                                    llm_tool, llm_route_ms = tool_call["name"], (time.perf_counter() - start) * 1000
+                                yield "tool_call", tool_call["name"]
+                        text = chunk_text(chunk)
+                        if text:
+                            yield "token", text
+                    else:
+                        for update in data.values():
+                            for message in (update or {}).get("messages", []):
+                                if isinstance(message, ToolMessage):
+                                    terminal_done = terminal_done or message.name in TERMINAL_TOOLS
+                                    yield "tool_result", (message.name, message.content)
+
+                # checkpointer history
+                messages = self.checkpointer.get(config)["channel_values"]["messages"]
+        finally:
+            self.checkpointer.delete_thread(thread_id)
+            work_packages = pop_work_packages(thread_id)
+        log_route(maintenance_query, route, llm_tool, llm_route_ms)
+        yield "done", (messages, work_packages)
+
+    def run(self, maintenance_query: str, user_id: str, session_id: str = SHARED_SESSION):
+        """ Answers one query; returns (messages of the run, work-package PDFs built by the tools)."""
+        for kind, payload in self.stream(maintenance_query, user_id, session_id):
+            if kind == "done":
+                return payload
+
+
+_AGENT = None
+_AGENT_LOCK = threading.Lock()
+
+
+def get_maintenance_agent() -> MaintenanceAgent:
+    """ Process-wide MaintenanceAgent (graph compiled on first use)."""
+    global _AGENT
+    if _AGENT is None:
+        with _AGENT_LOCK:
+            if _AGENT is None:
+                _AGENT = MaintenanceAgent()
+    return _AGENT
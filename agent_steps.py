@@ -0,0 +1,106 @@
+# Tool steps shared by the agent tools (agent_factory) and the fixed-edge pipeline (GRAPH.maintenance_graph)
+import threading
+
+from find_tasks_efficient import format_task_list
+from rag_engine import get_rag_engine
+from task_index import get_task_index, format_task_table
+from task_graph import get_task_graph
+from prompts.tech_prompts import diagnose_prompt, find_task_prompt
+from AUX.auxiliary_functions import find_pdf_from_task_numbers
+from work_package import build_work_package
+from package_store import get_package_store
+
+
+# Work-package PDFs built by the tools, per agent thread (read by MaintenanceAgent.stream)
+_WORK_PACKAGES = {}
+_WORK_PACKAGES_LOCK = threading.Lock()
+
+
+def add_work_package(pdf_result: dict, query: str, session_id: str, thread_id: str):
+    """ Streams the delivered task files into one downloadable work-package PDF."""
+    if pdf_result["copied"]:
+        store = get_package_store()
+        package_path = build_work_package(pdf_result, query=query, folder=store.package_dir(session_id))
+        store.record(session_id, [package_path])
+        with _WORK_PACKAGES_LOCK:
+            _WORK_PACKAGES.setdefault(thread_id, []).append(package_path)
+
+
+def pop_work_packages(thread_id: str) -> list:
+    """ Work packages built during the run of `thread_id` (removed from the registry)."""
+    with _WORK_PACKAGES_LOCK:
+        return _WORK_PACKAGES.pop(thread_id, [])
+
+
+# --------------------------
+# Tool steps
+#---------------------------
+def lookup_tasks(components: str, session_id: str, thread_id: str, diagnosis: str = None) -> str:
+    """
+    Task table for the components, with their PDFs delivered as a work package.
+    `diagnosis` (symptoms_rag answer) routes the retrieval to its chapters when the components don't.
+    """
+    # ---- Use only once to create and load vectorstore (e.g. with new manual version)
+    # build_and_save_vectorstore(PDF_FILES) and then get_rag_engine().reload()
+
+    # --- Use the already loaded (warm) vector store
+    engine = get_rag_engine().warm_up()
+
+    component_system = components
+    if component_system.lower() == "none":
+        return "Thank you for using AI_AMTMan.\nHasta la vista baby...!"
+
+    # Known task codes / pageblocks in the query: answer from the task index (no retrieval, no LLM),
+    # delivered with their prerequisite and follow-up tasks from the reference graph
+    task_codes = get_task_index().known_codes(component_system)
+    if task_codes:
+        roles = get_task_graph().bundle(task_codes)
+        task_codes = [code for code in roles if code in get_task_index().index]
+        add_work_package(find_pdf_from_task_numbers(task_codes, session_id), component_system, session_id, thread_id)
+        return format_task_table(get_task_index(), task_codes, roles)
+
+    print("Thinking...")
+
+    # Retrieve of stored docs and Prompt Template
+    retrieved_docs2 = engine.retrieve(component_system, k=4, diagnosis=diagnosis)
+    context = "\n\n---".join(doc.page_content for doc in retrieved_docs2)
+    prompt_template = find_task_prompt(component_system, context)
+
+    # Invoking of response (structured: tasks table + task codes)
+    task_list = engine.task_list_model.invoke(prompt_template)
+    task_codes = task_list.task_codes or [row.code for row in task_list.tasks]
+    add_work_package(find_pdf_from_task_numbers(task_codes, session_id), component_system, session_id, thread_id)
+    return format_task_list(task_list)
+
+
+def diagnose_symptoms(symptoms_user: str) -> str:
+    """ Most likely systems/components for the symptoms (diagnosis RAG)."""
+    # ----- Offline RAG components (persisted diagnosis index, loaded once by the engine)
+    engine = get_rag_engine().warm_up()
+    retriever_srag, model_rag = engine.symptoms_retriever, engine.symptoms_model
+
+    # ----- Online (Retrieve, Augment, Generate)
+    user_question = symptoms_user
+    if user_question.lower() == "none":
+        return "Thank you for using AI_AMTMan.\nHasta la vista baby...!"
+    # 1. Retrieve
+    retrieved_docs_srag = retriever_srag.invoke(user_question)
+    context_srag = "\n\n".join([doc.page_content for doc in retrieved_docs_srag])
+
+    # 2. Augment
+    prompt_template_srag = diagnose_prompt(user_question, context_srag)
+
+    # 3. Generate response
+    rag_response = model_rag.invoke(prompt_template_srag)
+    print(f"\nAnswer: \n {rag_response.content}")
+
+    return f"\nAnswer: \n {rag_response.content}"
+
+
+
+def chunk_text(chunk) -> str:
+    """ Text of a streamed message chunk (plain string or a list of content blocks)."""
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(block.get("text", "") for block in chunk.content
+                   if isinstance(block, dict) and block.get("type") == "text")
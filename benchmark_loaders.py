@@ -0,0 +1,38 @@
+# Throughput comparison of the PDF (PyPDFLoader) and MPP XML page loaders
+import time
+import sys
+
+from PDF.pdf_files import manual_files
+from find_tasks_efficient import load_documents
+
+
+def benchmark_loader(pdf_files, loader: str) -> dict:
+    """ Loads every file with `loader` and returns pages, characters and elapsed seconds."""
+    pages = 0
+    chars = 0
+    start = time.perf_counter()
+    for pdf_path in pdf_files:
+        docs = load_documents(pdf_path, loader)
+        pages += len(docs)
+        chars += sum(len(doc.page_content) for doc in docs)
+    elapsed = time.perf_counter() - start
+    return {"loader": loader, "files": len(pdf_files), "pages": pages, "chars": chars, "seconds": elapsed}
+
+
+def main(pdf_files):
+    results = [benchmark_loader(pdf_files, loader) for loader in ("pdf", "xml")]
+
+    print(f"\n{'loader':<8}{'files':>7}{'pages':>8}{'chars':>12}{'seconds':>10}{'pages/s':>10}")
+    for r in results:
+        print(f"{r['loader']:<8}{r['files']:>7}{r['pages']:>8}{r['chars']:>12}"
+              f"{r['seconds']:>10.2f}{r['pages'] / r['seconds']:>10.1f}")
+
+    pdf, xml = results
+    print(f"\nXML loader speed-up: {pdf['seconds'] / xml['seconds']:.1f}x")
+
+
+#-------------------
+# Usage: python benchmark_loaders.py [file.PDF ...]   (defaults to all chapter TOCs)
+#---------------
+if __name__ == "__main__":
+    main(sys.argv[1:] or manual_files())
@@ -0,0 +1,156 @@
+# Corpus-statistics-driven removal of repeated page boilerplate before chunking
+import os
+import re
+import json
+from collections import Counter
+
+TOKEN = re.compile(r"\S+")
+DIGITS = re.compile(r"\d+")
+# Task codes, pageblocks, sections and revision dates ("Oct 30/15"): content, never boilerplate
+PROTECTED = re.compile(r"\d{2}-\d{2}-\d{2}(?:-\d{3}-\d{3}-[A-Za-z]|/\d{3})?|\b\d{1,2}/\d{2}\b")
+BOILERPLATE_FILE = "boilerplate.json"   # fitted n-grams, saved next to the FAISS index they were used for
+
+_ENCODING = None           # text-embedding-3-* tokenizer, loaded on first use
+_ENCODING_LOADED = False
+
+
+def _encoding():
+    """ tiktoken's cl100k_base, or None when tiktoken is missing or the encoding can't be fetched (offline)."""
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        _ENCODING_LOADED = True
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable ({e}): token counts are estimated from words.")
+    return _ENCODING
+
+
+def count_tokens(text: str) -> int:
+    """ Embedding tokens in `text` (estimated from words when tiktoken is not available)."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return int(len(text.split()) * 1.3)
+
+
+class BoilerplateCleaner:
+    """
+    Learns which word sequences repeat on many pages of the corpus (headers,
+    footers, copyright lines) and strips them from every page.
+
+    A page is reduced to its set of word n-grams with numbers masked
+    ("Page 3 of 18 Rev 48" == "Page 7 of 12 Rev 51"); every n-gram found on at
+    least `min_fraction` of the pages is boilerplate, and any word covered by
+    a boilerplate n-gram is removed. Works on line-based PDF text and on the
+    single-line XML page text alike.
+
+    Task codes, pageblocks and dates are not masked and n-grams containing
+    one are never boilerplate: on the TOC pages every entry has the same
+    "<code> U Oct 30/15" shape, masked they would all look like a header.
+    """
+
+    def __init__(self, ngram: int = 3, min_fraction: float = 0.5, min_pages: int = 5, boilerplate=None):
+        self.ngram = ngram
+        self.min_fraction = min_fraction
+        self.min_pages = min_pages
+        self.boilerplate = set(boilerplate or ())     # learned n-grams (can be handed to worker processes)
+        self.stats = {"pages": 0, "tokens_before": 0, "tokens_after": 0}
+
+    @staticmethod
+    def _normalize(word: str) -> str:
+        if PROTECTED.search(word):
+            return word.lower()
+        return DIGITS.sub("#", word.lower())
+
+    def _ngrams(self, words: list):
+        n = self.ngram
+        return (tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+
+    # --------------------------
+    # Corpus statistics
+    # --------------------------
+    def fit(self, docs: list):
+        """ Collects n-gram page frequencies over `docs` (one Document per page)."""
+        page_frequency = Counter()
+        for doc in docs:
+            words = [self._normalize(w) for w in doc.page_content.split()]
+            page_frequency.update(set(self._ngrams(words)))
+
+        threshold = max(self.min_pages, self.min_fraction * len(docs))
+        self.boilerplate = {gram for gram, count in page_frequency.items()
+                            if count >= threshold and not any(PROTECTED.search(word) for word in gram)}
+        print(f"Boilerplate: {len(self.boilerplate)} repeated {self.ngram}-grams found in {len(docs)} pages.")
+        return self
+
+    # --------------------------
+    # Cleaning
+    # --------------------------
+    def clean_text(self, text: str) -> str:
+        tokens = list(TOKEN.finditer(text))
+        words = [self._normalize(t.group()) for t in tokens]
+        removed = [False] * len(tokens)
+        for i, gram in enumerate(self._ngrams(words)):
+            if gram in self.boilerplate:
+                removed[i:i + self.ngram] = [True] * self.ngram
+
+        # Keep the original spacing (and line breaks) between kept words
+        parts = []
+        previous_end = None
+        for token, drop in zip(tokens, removed):
+            if drop:
+                continue
+            if previous_end is not None:
+                gap = text[previous_end:token.start()]
+                if gap.strip():     # words were removed in between
+                    gap = "\n" if "\n" in gap else " "
+                parts.append(gap)
+            parts.append(token.group())
+            previous_end = token.end()
+        return "".join(parts)
+
+    def clean_documents(self, docs: list) -> list:
+        """ Strips the learned boilerplate from every page (in place) and updates the token report."""
+        for doc in docs:
+            before = doc.page_content
+            doc.page_content = self.clean_text(before)
+            self.stats["pages"] += 1
+            self.stats["tokens_before"] += count_tokens(before)
+            self.stats["tokens_after"] += count_tokens(doc.page_content)
+        return docs
+
+    def fit_clean(self, docs: list) -> list:
+        return self.fit(docs).clean_documents(docs)
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def save(self, folder: str):
+        """ Saves the fitted n-grams, so incremental and sharded builds clean pages the same way."""
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, BOILERPLATE_FILE), "w") as f:
+            json.dump({"ngram": self.ngram, "boilerplate": sorted(self.boilerplate)}, f)
+        return self
+
+    @classmethod
+    def load(cls, folder: str):
+        """ The cleaner saved in `folder`, or None."""
+        path = os.path.join(folder, BOILERPLATE_FILE)
+        if not os.path.isfile(path):
+            return None
+        with open(path) as f:
+            saved = json.load(f)
+        return cls(ngram=saved["ngram"], boilerplate=[tuple(gram) for gram in saved["boilerplate"]])
+
+    def add_stats(self, stats: dict):
+        """ Adds the token counts of another cleaner (e.g. one running in a worker process)."""
+        for key in self.stats:
+            self.stats[key] += stats.get(key, 0)
+
+    def report(self) -> dict:
+        saved = self.stats["tokens_before"] - self.stats["tokens_after"]
+        share = saved / self.stats["tokens_before"] if self.stats["tokens_before"] else 0.0
+        print(f"Boilerplate cleaning: {self.stats['pages']} pages, {self.stats['tokens_before']} -> "
+              f"{self.stats['tokens_after']} tokens ({saved} saved, {share:.1%}).")
+        return {**self.stats, "tokens_saved": saved}
@@ -0,0 +1,192 @@
+# One FAISS shard per ATA chapter, an LRU cache of loaded shards and a chapter router
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_community.vectorstores import FAISS
+
+from embedding_cache import CachedEmbeddings
+from find_tasks_efficient import load_documents, split_documents, index_cleaner, FAISS_FOLDER
+from mpp_xml import read_chapter_tree
+
+SHARDS_FOLDER = os.path.join(FAISS_FOLDER, "shards")   # one sub-folder per CHAPTER_xx
+MAX_LOADED_SHARDS = 6
+
+CHAPTER_OF_FILE = re.compile(r"MPP1285_(\d{2})")
+EXPLICIT_CHAPTER = re.compile(r"\b(?:ATA|chapter|chap\.?|ch\.?)\s*(\d{2})\b", re.IGNORECASE)
+TASK_CODE_CHAPTER = re.compile(r"\b(\d{2})-\d{2}-\d{2}\b")
+STOPWORDS = {"and", "the", "of", "or", "to", "a", "an", "in", "on", "for", "with", "systems", "system",
+             "practices", "standard", "description"}
+
+
+def chapter_label(chapter: str) -> str:
+    return f"CHAPTER_{chapter}"
+
+
+def chapter_of_file(path: str):
+    """ Chapter number of a manual file, e.g. "21" for "PDF/025-MPP1285_21-TOC.PDF"."""
+    match = CHAPTER_OF_FILE.search(os.path.basename(path))
+    return match.group(1) if match else None
+
+
+# --------------------------
+# Build (offline)
+# --------------------------
+def build_chapter_shards(pdf_files, loader="pdf", shards_folder=SHARDS_FOLDER):
+    """
+    Builds and saves one FAISS index per ATA chapter found in `pdf_files`, cleaned
+    with the boilerplate n-grams of the flat index (same chunk text in both).
+    """
+    pdf_files = list(pdf_files)
+    cleaner = index_cleaner(pdf_files, loader)
+    by_chapter = {}
+    for pdf_path in pdf_files:
+        by_chapter.setdefault(chapter_of_file(pdf_path), []).append(pdf_path)
+    by_chapter.pop(None, None)
+
+    embeddings = CachedEmbeddings()
+    for chapter, files in sorted(by_chapter.items()):
+        chunks = []
+        for pdf_path in files:
+            chunks.extend(split_documents(load_documents(pdf_path, loader), cleaner=cleaner))
+        if not chunks:
+            continue
+        for chunk in chunks:
+            chunk.metadata["chapter"] = chapter
+
+        FAISS.from_documents(chunks, embeddings).save_local(os.path.join(shards_folder, chapter_label(chapter)))
+        print(f"Shard {chapter_label(chapter)}: {len(chunks)} chunks from {len(files)} files.")
+
+
+def available_shards(shards_folder=SHARDS_FOLDER) -> list:
+    if not os.path.isdir(shards_folder):
+        return []
+    return sorted(label for label in os.listdir(shards_folder) if label.startswith("CHAPTER_"))
+
+
+# --------------------------
+# Router
+# --------------------------
+class ChapterRouter:
+    """
+    Picks the chapter shards relevant to a query, in order of preference:
+        1) explicit chapters ("ATA 21", "chapter 36") or task codes ("21-51-03")
+        2) the same in the diagnosis output (symptoms_rag answer), if given
+        3) keywords matched against the chapter descriptions of ADM_AMM_1285_TREE.xml
+    Returns an empty list when nothing matches (caller searches the flat index).
+    """
+
+    def __init__(self, tree=None):
+        tree = tree or read_chapter_tree()
+        self.keywords = {}
+        for label, desc in tree.items():
+            words = re.findall(r"[a-z]+", (desc or "").lower())
+            self.keywords[label] = {w for w in words if w not in STOPWORDS and len(w) > 2}
+
+    @staticmethod
+    def explicit_chapters(text: str) -> list:
+        chapters = EXPLICIT_CHAPTER.findall(text) + TASK_CODE_CHAPTER.findall(text)
+        return list(dict.fromkeys(chapter_label(c) for c in chapters))
+
+    def keyword_chapters(self, text: str) -> list:
+        words = set(re.findall(r"[a-z]+", text.lower()))
+        scores = {}
+        for label, keywords in self.keywords.items():
+            # prefix match so "pneumatics"/"pneumatic" or "lights"/"light" both count
+            hits = sum(1 for k in keywords for w in words if w.startswith(k) or (k.startswith(w) and len(w) > 3))
+            if hits:
+                scores[label] = hits
+        if not scores:
+            return []
+        best = max(scores.values())
+        return sorted((label for label in scores if 2 * scores[label] >= best), key=scores.get, reverse=True)[:3]
+
+    def route(self, query: str, chapters=None, diagnosis: str = None) -> list:
+        if chapters:
+            return [chapter_label(c) if not str(c).startswith("CHAPTER_") else c for c in chapters]
+        selected = self.explicit_chapters(query)
+        if not selected and diagnosis:
+            selected = self.explicit_chapters(diagnosis)
+        if not selected:
+            selected = self.keyword_chapters(query)
+        if not selected and diagnosis:
+            selected = self.keyword_chapters(diagnosis)
+        return selected
+
+
+# --------------------------
+# Lazy LRU shard cache and sharded search
+# --------------------------
+class ShardCache:
+    """ Loads chapter shards on first use and keeps at most `max_loaded` of them (LRU)."""
+
+    def __init__(self, shards_folder=SHARDS_FOLDER, max_loaded=MAX_LOADED_SHARDS, embeddings=None):
+        self.shards_folder = shards_folder
+        self.max_loaded = max_loaded
+        self.embeddings = embeddings or CachedEmbeddings()
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, label: str):
+        with self._lock:
+            if label in self._shards:
+                self._shards.move_to_end(label)
+                return self._shards[label]
+
+        # Load outside the lock so other shards stay available meanwhile
+        shard = FAISS.load_local(os.path.join(self.shards_folder, label), self.embeddings,
+                                 allow_dangerous_deserialization=True)
+        with self._lock:
+            self._shards[label] = shard
+            self._shards.move_to_end(label)
+            while len(self._shards) > self.max_loaded:
+                evicted, _ = self._shards.popitem(last=False)
+                print(f"Evicted shard {evicted}")
+        return shard
+
+
+class ShardedRetriever:
+    """
+    Searches only the routed chapter shards, in parallel, and merges the hits by score.
+    Queries routed to no shard (nothing matched, or a chapter without a shard) go to
+    `fallback(query, k)`, the flat index, instead of loading every shard.
+    """
+
+    def __init__(self, shards_folder=SHARDS_FOLDER, max_loaded=MAX_LOADED_SHARDS, fallback=None):
+        self.shards_folder = shards_folder
+        self.cache = ShardCache(shards_folder, max_loaded)
+        self.router = ChapterRouter()
+        self.available = set(available_shards(shards_folder))
+        self.fallback = fallback
+
+    def route(self, query: str, chapters=None, diagnosis: str = None) -> list:
+        """ Labels of the available shards routed from `chapters`, the query or the diagnosis."""
+        return [label for label in self.router.route(query, chapters, diagnosis) if label in self.available]
+
+    def search(self, query: str, k: int = 4, chapters=None, diagnosis: str = None) -> list:
+        labels = self.route(query, chapters, diagnosis)
+        if not labels:
+            return self.fallback(query, k) if self.fallback else []
+
+        # Embed the query once for every shard
+        query_vector = self.cache.embeddings.embed_query(query)
+
+        def search_shard(label):
+            return self.cache.get(label).similarity_search_with_score_by_vector(query_vector, k=k)
+
+        with ThreadPoolExecutor(max_workers=min(len(labels), 8)) as pool:
+            hits = [hit for shard_hits in pool.map(search_shard, labels) for hit in shard_hits]
+
+        hits.sort(key=lambda hit: hit[1])   # L2 distance, smaller is closer
+        return [doc for doc, _ in hits[:k]]
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    from PDF.pdf_files import manual_files
+
+    build_chapter_shards(manual_files(), loader="xml")
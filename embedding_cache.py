@@ -0,0 +1,138 @@
+# Content-addressed on-disk embedding cache with a batched, concurrent OpenAI client
+import os
+import time
+import random
+import sqlite3
+import hashlib
+from array import array
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+load_dotenv()
+API_KEY = os.getenv("OPENAI_API_KEY")
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_CACHE_DB = "faiss_index/embedding_cache.db"
+SQLITE_MAX_VARS = 900      # stays below SQLite's bound-parameter limit
+
+
+def normalize_text(text: str) -> str:
+    """ Whitespace-normalized text, so re-extracted chunks hit the same cache entry."""
+    return " ".join(text.split())
+
+
+def cache_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings stored under SHA-256(model + normalized chunk text) in SQLite.
+
+    Only cache misses are sent to OpenAI: de-duplicated, in batches of
+    `batch_size` texts, with at most `max_concurrency` requests at a time and
+    exponential backoff on errors. Rebuilds, chunk-size experiments and the
+    symptoms index reuse every vector already paid for.
+    """
+
+    def __init__(self, model: str = EMBEDDING_MODEL, cache_path: str = EMBEDDING_CACHE_DB,
+                 batch_size: int = 512, max_concurrency: int = 4, max_retries: int = 6):
+        self.model = model
+        self.cache_path = cache_path
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.client = OpenAIEmbeddings(model=model, api_key=API_KEY, chunk_size=batch_size, max_retries=0)
+
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.cache_path, timeout=30)
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    # --------------------------
+    # Cache access
+    # --------------------------
+    def _lookup(self, keys: list) -> dict:
+        found = {}
+        with self._connect() as conn:
+            for i in range(0, len(keys), SQLITE_MAX_VARS):
+                part = keys[i:i + SQLITE_MAX_VARS]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, vectors: dict):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                [(key, self.model, array("f", vector).tobytes()) for key, vector in vectors.items()]
+            )
+
+    # --------------------------
+    # OpenAI calls
+    # --------------------------
+    def _embed_batch(self, texts: list) -> list:
+        """ One embeddings request with exponential backoff (plus jitter) on failure."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.client.embed_documents(texts)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60, 2 ** attempt) + random.random()
+                print(f"Embedding batch failed ({e}). Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+    # --------------------------
+    # Embeddings interface
+    # --------------------------
+    def embed_documents(self, texts: list) -> list:
+        keys = [cache_key(text, self.model) for text in texts]
+        vectors = self._lookup(list(set(keys)))
+
+        # De-duplicated misses, in batches
+        misses = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in misses:
+                misses[key] = normalize_text(text)
+        miss_keys = list(misses)
+        batches = [miss_keys[i:i + self.batch_size] for i in range(0, len(miss_keys), self.batch_size)]
+
+        if batches:
+            print(f"Embedding cache: {len(texts) - len(miss_keys)} hits, {len(miss_keys)} misses "
+                  f"in {len(batches)} batches.")
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                results = pool.map(lambda batch: self._embed_batch([misses[k] for k in batch]), batches)
+                for batch, batch_vectors in zip(batches, results):
+                    new_vectors = dict(zip(batch, batch_vectors))
+                    self._store(new_vectors)     # persisted per batch, a failed build keeps its progress
+                    vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text: str) -> list:
+        # Queries are rarely repeated: straight to the client, only documents fill the cache
+        return self.client.embed_query(normalize_text(text))
@@ -0,0 +1,11 @@
+# Small file helpers shared by the index builders (no heavy imports)
+import hashlib
+
+
+def file_md5(path: str) -> str:
+    """ MD5 hex digest of a file, read in blocks."""
+    md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            md5.update(block)
+    return md5.hexdigest()
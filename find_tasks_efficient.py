@@ -1,16 +1,23 @@
 # Imports os & dotenv environment
 import os
+import json
+import hashlib
 from dotenv import load_dotenv
 import ast
+from pydantic import BaseModel, Field
 
 # Imports required Langchain libraries
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
+from embedding_cache import CachedEmbeddings
 
-# Loads maintenance manual pdf file directory
+# Loads maintenance manual pdf file directory and MPP XML metadata readers
 from PDF.pdf_files import manual_files
+from mpp_xml import read_file_info, find_xml_for, CHG_DELETED, MPPXMLLoader
+from mpp_splitter import MPPTaskSplitter
+from boilerplate import BoilerplateCleaner
 
 # Loads predefined prompts (find tasks, user welcome)
 from prompts.tech_prompts import find_task_prompt, USER_WELCOME
@@ -22,56 +29,234 @@ PDF_FILES = manual_files()      # Gets all directory manual (MPP) references
 FAISS_FOLDER = "faiss_index"       # folder where FAISS is stored
 FAISS_INDEX_FILE = "index.faiss"   # binary FAISS index
 FAISS_STORE_FILE = "index.pkl"     # metadata store
+MANIFEST_FILE = "manifest.json"    # ingested documents, their hashes and vector ids
 
 def user_welcome():
     print(USER_WELCOME)
 
 
+# --------------------------
+# Structured task list (find_task_prompt answer)
+# --------------------------
+class TaskRow(BaseModel):
+    code: str = Field(description="Task code or pageblock, e.g. 21-51-01-000-801-A")
+    description: str = Field(description="Brief description of the task")
+    chapter: str = Field(description="ATA chapter, e.g. 21")
+
+
+class TaskList(BaseModel):
+    tasks: list[TaskRow] = Field(description="Tasks relevant to the components")
+    task_codes: list[str] = Field(description="Every task code of the tasks table")
+
+
+def format_task_list(task_list: TaskList) -> str:
+    """ Markdown table of a structured task list (the answer of find_tasks)."""
+    if not task_list.tasks:
+        return "No tasks found for these components."
+    lines = ["| Task | Description | ATA |", "|---|---|---|"]
+    lines += [f"| {row.code} | {row.description} | {row.chapter} |" for row in task_list.tasks]
+    return "\n".join(lines)
+
+
 def extract_task_list(text: str)->list:
-    """ Last line reading of plain text (auxiliary, needs ast import)"""
+    """ Last line reading of plain text (auxiliary, needs ast import; OLD/ apps)"""
     lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
     last_line = lines[-1]          # get the final line
     task_list = ast.literal_eval(last_line)
     return task_list
 
 
+def load_documents(pdf_path: str, loader: str = "pdf") -> list:
+    """
+    Loads the pages of a manual file.
+        loader="pdf": parses the PDF with PyPDFLoader
+        loader="xml": reads the pre-extracted page text of the matching MPP XML (much faster)
+    """
+    if loader == "xml":
+        xml_path = find_xml_for(pdf_path)
+        if xml_path is None:
+            raise FileNotFoundError(f"No MPP XML found for: {pdf_path}")
+        return MPPXMLLoader(xml_path).load()
+    if loader == "pdf":
+        return PyPDFLoader(pdf_path).load()
+    raise ValueError(f"Unknown loader: {loader}")
+
+
+def split_documents(docs: list, splitter: str = "task", cleaner=None) -> list:
+    """
+    Splits loaded pages into the chunks that get embedded.
+        splitter="task": by task and sub-section, without page headers/footers (MPPTaskSplitter)
+        splitter="recursive": fixed 500-character chunks
+    A fitted BoilerplateCleaner, if given, strips repeated page boilerplate first.
+    """
+    if cleaner is not None:
+        cleaner.clean_documents(docs)
+    if splitter == "task":
+        return MPPTaskSplitter().split_documents(docs)
+    if splitter == "recursive":
+        # Tried from 500 to 3000 split with no noticeable difference noted
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+        return text_splitter.split_documents(docs)
+    raise ValueError(f"Unknown splitter: {splitter}")
+
+
+def fit_boilerplate(pdf_files, loader="pdf", sample_files=50) -> BoilerplateCleaner:
+    """ Learns the repeated page boilerplate from an evenly spread sample of the files."""
+    step = max(1, len(pdf_files) // sample_files)
+    sample = [page for pdf_path in pdf_files[::step] for page in load_documents(pdf_path, loader)]
+    return BoilerplateCleaner().fit(sample)
+
+
+def index_cleaner(pdf_files, loader="pdf", faiss_folder=FAISS_FOLDER) -> BoilerplateCleaner:
+    """
+    The cleaner saved with the FAISS index (every build path must produce the same
+    chunk text for a page); fitted on the files and saved when there is none yet.
+    """
+    cleaner = BoilerplateCleaner.load(faiss_folder)
+    if cleaner is None:
+        print("No saved boilerplate n-grams: fitting them on the manual files.")
+        cleaner = fit_boilerplate(list(pdf_files), loader).save(faiss_folder)
+    return cleaner
+
+
 # 1. Build and save vectorstore (needs to be run only when the MPP manual changes)
 
-def build_and_save_vectorstore(pdf_files):
-    all_docs = []
+def build_and_save_vectorstore(pdf_files, loader="pdf"):
+    files = []
 
-    # Load PDFs
+    # Load PDFs (or their XML page text)
     for pdf_path in pdf_files:
-        loader = PyPDFLoader(pdf_path)
-        docs = loader.load()
+        docs = load_documents(pdf_path, loader)
         print(f"Loaded {len(docs)} documents from: {pdf_path}")
-        all_docs.extend(docs)
+        files.append((document_info(pdf_path), docs))
+    all_docs = [doc for _, docs in files for doc in docs]
 
     print(f"Total documents loaded: {len(all_docs)}")
 
-    # Split -------Tried from 500 to 3000 split with no noticeable difference noted
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = text_splitter.split_documents(all_docs)
+    # Clean (repeated headers/footers learned from the corpus) & Split, file by file for the manifest
+    cleaner = BoilerplateCleaner().fit(all_docs)
+    chunks, vector_ids, manifest = [], [], {}
+    for info, docs in files:
+        file_chunks = split_documents(docs, cleaner=cleaner)
+        file_ids = [f"{info['id']}:{i}" for i in range(len(file_chunks))]
+        chunks.extend(file_chunks)
+        vector_ids.extend(file_ids)
+        manifest[info["id"]] = {"hash": info["hash"], "source": info["source"], "vector_ids": file_ids}
+    cleaner.report()
     print(f"Documents split into {len(chunks)} chunks.")
+    if not chunks:
+        print("No chunks to embed.")
+        return
 
     # Embed & Store
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=API_KEY)
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+    embeddings = CachedEmbeddings()
+    vectorstore = FAISS.from_documents(chunks, embeddings, ids=vector_ids)
 
-    # Save to disk
+    # Save to disk (with the manifest, so the next update_vectorstore only embeds what changed)
     print("Saving FAISS index to disk...")
     vectorstore.save_local(FAISS_FOLDER)
+    cleaner.save(FAISS_FOLDER)
+    save_manifest(manifest, FAISS_FOLDER)
     print("FAISS saved successfully!")
 
 
+# 1b. Incremental update of the vectorstore (new manual revision)
+
+def load_manifest(faiss_folder=FAISS_FOLDER) -> dict:
+    """ Manifest of ingested documents: {doc_id: {"hash", "source", "vector_ids"}}."""
+    manifest_path = os.path.join(faiss_folder, MANIFEST_FILE)
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, faiss_folder=FAISS_FOLDER):
+    manifest_path = os.path.join(faiss_folder, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, manifest_path)
+
+
+def document_info(pdf_path: str) -> dict:
+    """ Id, revision status and hash of a manual PDF, taken from its MPP XML <file> element."""
+    xml_path = find_xml_for(pdf_path)
+    if xml_path:
+        info = read_file_info(xml_path)
+    else:
+        # No XML next to the PDF: hash the PDF itself (the XML <hash> is the PDF MD5 too)
+        with open(pdf_path, "rb") as f:
+            pdf_hash = hashlib.md5(f.read()).hexdigest()
+        info = {"id": os.path.splitext(os.path.basename(pdf_path))[0], "chg": None, "hash": pdf_hash}
+    info["source"] = pdf_path
+    return info
+
+
+def update_vectorstore(pdf_files, faiss_folder=FAISS_FOLDER, loader="pdf"):
+    """
+    Incremental ingest: embeds only new and revised documents and deletes the
+    vectors of deleted ones, using the manifest saved next to the FAISS index.
+    Without a manifest (first run) every document is embedded.
+    """
+    manifest = load_manifest(faiss_folder)
+    current = {info["id"]: info for info in map(document_info, pdf_files)}
+
+    deleted = [doc_id for doc_id in manifest
+               if doc_id not in current or current[doc_id]["chg"] == CHG_DELETED]
+    changed = [info for doc_id, info in current.items()
+               if info["chg"] != CHG_DELETED and manifest.get(doc_id, {}).get("hash") != info["hash"]]
+    revised = [info["id"] for info in changed if info["id"] in manifest]
+    print(f"Manifest: {len(changed) - len(revised)} new, {len(revised)} revised, "
+          f"{len(deleted)} deleted, {len(current) - len(changed)} unchanged documents.")
+
+    if not changed and not deleted:
+        print("FAISS index is up to date.")
+        return
+
+    embeddings = CachedEmbeddings()
+    cleaner = index_cleaner([info["source"] for info in changed] or pdf_files, loader, faiss_folder)
+    vectorstore = None
+    if manifest:
+        vectorstore = FAISS.load_local(faiss_folder, embeddings, allow_dangerous_deserialization=True)
+
+        # Drop the vectors of deleted documents and the old vectors of revised ones
+        stale_ids = [vid for doc_id in deleted + revised for vid in manifest[doc_id]["vector_ids"]]
+        if stale_ids:
+            vectorstore.delete(stale_ids)
+        for doc_id in deleted:
+            del manifest[doc_id]
+
+    for info in changed:
+        chunks = split_documents(load_documents(info["source"], loader), cleaner=cleaner)
+        vector_ids = [f"{info['id']}:{i}" for i in range(len(chunks))]
+        if chunks and vectorstore is None:
+            vectorstore = FAISS.from_documents(chunks, embeddings, ids=vector_ids)
+        elif chunks:
+            vectorstore.add_documents(chunks, ids=vector_ids)
+        manifest[info["id"]] = {"hash": info["hash"], "source": info["source"], "vector_ids": vector_ids}
+        print(f"Embedded {len(chunks)} chunks from: {info['source']}")
+
+    if vectorstore is None:
+        print("No chunks to embed.")
+        return
+
+    # Save to disk, manifest last so an interrupted update is redone
+    print("Saving FAISS index to disk...")
+    vectorstore.save_local(faiss_folder)
+    save_manifest(manifest, faiss_folder)
+    print("FAISS updated successfully!")
+
+
 # 2. Load RAG components
 
-def load_rag_components():
+def load_rag_components(faiss_folder=FAISS_FOLDER):
     # LOAD FAISS FROM DISK
+    # (the app keeps these loaded in rag_engine.RAGEngine instead of calling this per query)
     print("Loading FAISS index from disk...")
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=API_KEY)
+    embeddings = CachedEmbeddings()
     vectorstore = FAISS.load_local(
-        FAISS_FOLDER,
+        faiss_folder,
         embeddings,
         allow_dangerous_deserialization=True
     )
@@ -79,7 +264,13 @@ def load_rag_components():
 
     retriever = vectorstore.as_retriever()
 
-    model = ChatOpenAI(api_key=API_KEY, model="gpt-5-mini")
+    # Same parameters as the agent model (agent_factory.MaintenanceAgent): low reasoning effort
+    model = ChatOpenAI(
+        api_key=API_KEY,
+        temperature=0,
+        model="gpt-5-mini",
+        reasoning_effort="low"
+    )
 
     return retriever, model
 
@@ -91,6 +282,10 @@ if __name__ == "__main__":
     # -- Use only once to create and load vectorstore
     #build_and_save_vectorstore(PDF_FILES)
     # Uncomment the above line only for the very first run
+    # (for the full manual use ingest_pipeline.build_and_save_vectorstore_parallel)
+
+    # -- Use on a new manual revision (embeds only new/revised documents)
+    #update_vectorstore(PDF_FILES)
 
     # -- Regular use
     retriever, model = load_rag_components()
@@ -113,7 +308,6 @@ if __name__ == "__main__":
         prompt_template = find_task_prompt(component_system, context)
 
         # Generate
-        response = model.invoke(prompt_template)
-        #print("\nAnswer:\n", response.content)
-        print("\nAnswer:\n", response.content)
+        response = model.with_structured_output(TaskList).invoke(prompt_template)
+        print("\nAnswer:\n", format_task_list(response))
 
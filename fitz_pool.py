@@ -0,0 +1,107 @@
+# Bounded LRU pool of open PyMuPDF documents (TOC and task PDFs stay parsed between requests)
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+
+MAX_OPEN_DOCUMENTS = 32
+
+
+class _PooledDocument:
+    def __init__(self, doc):
+        self.doc = doc
+        self.lock = threading.Lock()    # fitz documents must not be used by two threads at once
+        self.users = 0
+        self.evicted = False
+
+
+class DocumentPool:
+    """
+    Open fitz.Document objects keyed by (absolute path, mtime), at most
+    `max_open` of them (least recently used are closed first).
+
+    A changed file gets a new key, so a stale document is never returned.
+    Documents are only handed out through document(), which serializes the
+    threads using the same file; a document evicted while in use is closed
+    when its last user is done.
+    """
+
+    def __init__(self, max_open: int = MAX_OPEN_DOCUMENTS):
+        self.max_open = max_open
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def document(self, path: str):
+        """ Pooled, read-only fitz.Document of `path` (do not close it)."""
+        path = os.path.abspath(path)
+        key = (path, os.path.getmtime(path))
+
+        with self._lock:
+            entry = self._docs.get(key)
+            if entry is not None:
+                self._docs.move_to_end(key)
+                entry.users += 1
+        if entry is None:
+            # Open outside the pool lock so other documents stay available meanwhile
+            opened = _PooledDocument(fitz.open(path))
+            with self._lock:
+                entry = self._docs.get(key)
+                if entry is None:
+                    entry = self._docs[key] = opened
+                    opened = None
+                entry.users += 1
+                # Older versions of the same file and least recently used documents go first
+                for stale in [k for k in self._docs if k[0] == path and k != key]:
+                    self._release(self._docs.pop(stale))
+                while len(self._docs) > self.max_open:
+                    _, evicted = self._docs.popitem(last=False)
+                    self._release(evicted)
+            if opened is not None:     # another thread opened it first
+                opened.doc.close()
+
+        try:
+            with entry.lock:
+                yield entry.doc
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if entry.evicted and entry.users == 0:
+                    entry.doc.close()
+
+    @staticmethod
+    def _release(entry: _PooledDocument):
+        """ Closes an evicted document now, or when its last user is done (pool lock held)."""
+        entry.evicted = True
+        if entry.users == 0:
+            entry.doc.close()
+
+    def close_all(self):
+        with self._lock:
+            while self._docs:
+                _, entry = self._docs.popitem(last=False)
+                self._release(entry)
+
+    def __len__(self):
+        return len(self._docs)
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_document_pool() -> DocumentPool:
+    """ Process-wide DocumentPool shared by the link, page and work-package code."""
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = DocumentPool()
+    return _POOL
+
+
+def open_document(path: str):
+    """ Shortcut for get_document_pool().document(path)."""
+    return get_document_pool().document(path)
@@ -0,0 +1,152 @@
+# Hybrid lexical (BM25) + vector retrieval fused with reciprocal-rank fusion
+import os
+import re
+import math
+import pickle
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from find_tasks_efficient import FAISS_FOLDER, FAISS_STORE_FILE
+from chapter_shards import chapter_of_file
+
+BM25_FILE = "bm25.pkl"      # lexical index saved next to the FAISS index it was built from
+RRF_K = 60                  # rank constant of reciprocal-rank fusion
+FETCH_FACTOR = 4            # candidates fetched per retriever for each result returned
+
+# Single tokens for ATA task codes / pageblocks ("21-20-00-100-805-A", "21-51-03/400") and
+# part or connector numbers (letters/digits joined by - / . with at least one digit: "145-12345-001", "P1234A")
+TOKEN = re.compile(
+    r"\d{2}-\d{2}-\d{2}(?:-\d{3}-\d{3}-[A-Za-z]|/\d{3})?(?![\w-])"
+    r"|(?=[\w./-]*\d)[A-Za-z0-9]+(?:[-/.][A-Za-z0-9]+)+"
+    r"|\w+"
+)
+SECTION = re.compile(r"^(\d{2}-\d{2}-\d{2})[-/]")
+STOPWORDS = {"the", "and", "of", "to", "a", "an", "in", "on", "for", "with", "or", "is", "be", "by", "as",
+             "at", "from", "that", "this", "are", "it", "if"}
+
+
+def tokenize(text: str) -> list:
+    """ Lowercase lexical tokens; task codes also add their section ("21-20-00") as a token."""
+    tokens = []
+    for token in TOKEN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        tokens.append(token)
+        section = SECTION.match(token)
+        if section:
+            tokens.append(section.group(1))
+    return tokens
+
+
+def document_key(doc) -> tuple:
+    return doc.metadata.get("source"), doc.metadata.get("page"), doc.page_content
+
+
+# --------------------------
+# BM25
+# --------------------------
+class BM25Index:
+    """ Okapi BM25 over a list of Documents (inverted index, scores only the query's postings)."""
+
+    def __init__(self, docs: list, k1: float = 1.5, b: float = 0.75):
+        self.docs = docs
+        self.k1, self.b = k1, b
+        self.postings = {}
+        self.lengths = []
+        for i, doc in enumerate(docs):
+            counts = Counter(tokenize(doc.page_content))
+            self.lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((i, tf))
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def idf(self, token: str) -> float:
+        n = len(self.postings.get(token, ()))
+        return math.log(1 + (len(self.docs) - n + 0.5) / (n + 0.5))
+
+    def search(self, query: str, k: int = 10, chapters=None) -> list:
+        """ [(Document, score)] of the k best BM25 matches (optionally only from `chapters`)."""
+        scores = Counter()
+        for token in set(tokenize(query)):
+            idf = self.idf(token)
+            for i, tf in self.postings.get(token, ()):
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / self.avg_length)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        chapters = {str(c)[-2:] for c in chapters} if chapters else None   # "CHAPTER_21" or "21"
+        hits = []
+        for i, score in scores.most_common():
+            doc = self.docs[i]
+            if chapters and (doc.metadata.get("chapter") or chapter_of_file(doc.metadata.get("source", ""))) \
+                    not in chapters:
+                continue
+            hits.append((doc, score))
+            if len(hits) == k:
+                break
+        return hits
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    @classmethod
+    def for_vectorstore(cls, vectorstore, faiss_folder: str = FAISS_FOLDER):
+        """
+        BM25 index of every chunk in a FAISS docstore, loaded from faiss_folder/bm25.pkl
+        when it is newer than the FAISS store, rebuilt and saved otherwise.
+        """
+        path = os.path.join(faiss_folder, BM25_FILE)
+        store = os.path.join(faiss_folder, FAISS_STORE_FILE)
+        if os.path.isfile(path) and os.path.isfile(store) and os.path.getmtime(path) >= os.path.getmtime(store):
+            with open(path, "rb") as f:
+                return pickle.load(f)
+
+        index = cls(list(vectorstore.docstore._dict.values()))
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        print(f"BM25 index: {len(index.docs)} chunks, {len(index.postings)} terms saved in {path}")
+        return index
+
+
+# --------------------------
+# Fusion
+# --------------------------
+def reciprocal_rank_fusion(rankings: list, k: int = RRF_K) -> list:
+    """ Documents of several ranked lists ordered by sum(1 / (k + rank)), duplicates merged."""
+    scores = {}
+    docs = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = document_key(doc)
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+class HybridRetriever:
+    """
+    Runs the vector search (`vector_search(query, k, chapters) -> [Document]`)
+    and the BM25 search in parallel and fuses both rankings with RRF, so exact task
+    codes, part numbers and connector IDs rank as well as paraphrases.
+
+    `route(query, chapters, diagnosis) -> chapters` picks the search scope once and
+    both searches get the same chapters (None: the whole manual), so RRF never
+    fuses rankings of different scopes.
+    """
+
+    def __init__(self, vector_search, bm25: BM25Index, fetch_factor: int = FETCH_FACTOR, route=None):
+        self.vector_search = vector_search
+        self.bm25 = bm25
+        self.fetch_factor = fetch_factor
+        self.route = route
+        self._pool = ThreadPoolExecutor(max_workers=4)
+
+    def search(self, query: str, k: int = 4, chapters=None, diagnosis: str = None) -> list:
+        fetch_k = k * self.fetch_factor
+        if self.route is not None:
+            chapters = self.route(query, chapters, diagnosis) or None
+        vector = self._pool.submit(self.vector_search, query, fetch_k, chapters)
+        lexical = self._pool.submit(self.bm25.search, query, fetch_k, chapters)
+        rankings = [vector.result(), [doc for doc, _ in lexical.result()]]
+        return reciprocal_rank_fusion(rankings)[:k]
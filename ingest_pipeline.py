@@ -0,0 +1,118 @@
+# Parallel (multi-process) ingestion of the MPP manual into the FAISS vectorstore
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from langchain_community.vectorstores import FAISS
+
+from embedding_cache import CachedEmbeddings
+from boilerplate import BoilerplateCleaner
+from find_tasks_efficient import (load_documents, split_documents, fit_boilerplate, document_info, save_manifest,
+                                  FAISS_FOLDER)
+
+
+def load_and_split(pdf_path: str, loader: str = "pdf", boilerplate=None) -> tuple:
+    """
+    Worker task: loads, cleans and splits ONE manual file.
+    Returns its chunks and the token counts of the boilerplate cleaning.
+    """
+    cleaner = BoilerplateCleaner(boilerplate=boilerplate) if boilerplate else None
+    chunks = split_documents(load_documents(pdf_path, loader), cleaner=cleaner)
+    return chunks, cleaner.stats if cleaner else {}
+
+
+def iter_chunk_batches(pdf_files, loader="pdf", workers=None, batch_size=2048, cleaner=None, doc_ids=None):
+    """
+    Yields (chunks, vector ids) batches of at most `batch_size` chunks while a
+    process pool loads and splits the files (one task per file). Vector ids are
+    "<doc id>:<chunk number>" as in the manifest (`doc_ids`: {pdf_path: doc id}).
+
+    At most 2 files per worker are in flight and chunks are handed out as soon
+    as a file is done, so peak memory depends on the number of workers and the
+    batch size, not on the size of the manual.
+    With a fitted `cleaner`, workers strip its boilerplate and their token
+    counts are added to it.
+    """
+    boilerplate = cleaner.boilerplate if cleaner else None
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    doc_ids = doc_ids or {}
+    files = iter(pdf_files)
+    batch, batch_ids = [], []
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def submit_next():
+            pdf_path = next(files, None)
+            if pdf_path is not None:
+                pending[pool.submit(load_and_split, pdf_path, loader, boilerplate)] = pdf_path
+
+        for _ in range(max_in_flight):
+            submit_next()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pdf_path = pending.pop(future)
+                chunks, stats = future.result()
+                if cleaner:
+                    cleaner.add_stats(stats)
+                print(f"Split {pdf_path} into {len(chunks)} chunks.")
+                submit_next()
+
+                doc_id = doc_ids.get(pdf_path, os.path.splitext(os.path.basename(pdf_path))[0])
+                batch.extend(chunks)
+                batch_ids.extend(f"{doc_id}:{i}" for i in range(len(chunks)))
+                while len(batch) >= batch_size:
+                    yield batch[:batch_size], batch_ids[:batch_size]
+                    batch, batch_ids = batch[batch_size:], batch_ids[batch_size:]
+
+    if batch:
+        yield batch, batch_ids
+
+
+def build_and_save_vectorstore_parallel(pdf_files, loader="pdf", workers=None, batch_size=2048,
+                                        faiss_folder=FAISS_FOLDER):
+    """ Same result as find_tasks_efficient.build_and_save_vectorstore, built with a process pool."""
+    pdf_files = list(pdf_files)
+    infos = {pdf_path: document_info(pdf_path) for pdf_path in pdf_files}
+    manifest = {info["id"]: {"hash": info["hash"], "source": info["source"], "vector_ids": []}
+                for info in infos.values()}
+    cleaner = fit_boilerplate(pdf_files, loader)
+    embeddings = CachedEmbeddings()
+    vectorstore = None
+    total = 0
+
+    # Embed & Store batch by batch
+    doc_ids = {pdf_path: info["id"] for pdf_path, info in infos.items()}
+    for batch, vector_ids in iter_chunk_batches(pdf_files, loader, workers, batch_size, cleaner, doc_ids):
+        if vectorstore is None:
+            vectorstore = FAISS.from_documents(batch, embeddings, ids=vector_ids)
+        else:
+            vectorstore.add_documents(batch, ids=vector_ids)
+        for vector_id in vector_ids:
+            manifest[vector_id.rsplit(":", 1)[0]]["vector_ids"].append(vector_id)
+        total += len(batch)
+        print(f"Embedded {total} chunks...")
+
+    if vectorstore is None:
+        print("No chunks to embed.")
+        return
+
+    cleaner.report()
+
+    # Save to disk
+    print("Saving FAISS index to disk...")
+    vectorstore.save_local(faiss_folder)
+    cleaner.save(faiss_folder)
+    save_manifest(manifest, faiss_folder)
+    print("FAISS saved successfully!")
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    from PDF.pdf_files import manual_files
+
+    build_and_save_vectorstore_parallel(manual_files(), loader="xml")
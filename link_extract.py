@@ -1,6 +1,11 @@
 import fitz  # PyMuPDF
 import os
 import shutil
+import platform
+import subprocess
+
+from fitz_pool import open_document
+from file_utils import file_md5
 
 #-----------------
 # Extract selected (allowed) links from text
@@ -20,31 +25,32 @@ def extract_links_by_text(file_path:str, task_numbers:list):
 
     task_numbers = [a.lower() for a in task_numbers]  # normalize
 
-    doc = fitz.open(file_path)
     results = []
 
-    for page_number, page in enumerate(doc, start=1):
-
-        for link in page.get_links():
-
-            if link.get("kind") == 3 and "file" in link:  # /F link
-                rect = fitz.Rect(link["from"])
-
-                # extract the text shown to the user
-                visible = page.get_text("text", clip=rect).strip()
-                visible_lc = visible.lower()
-
-                # check if any allowed text is inside the visible text
-                if any(a in visible_lc for a in task_numbers):
-                    results.append({
-                        "visible_text": visible,
-                        "target_pdf": link["file"]
-                    })
-                    # results.append({
-                    #     "page": page_number,
-                    #     "visible_text": visible,
-                    #     "target_pdf": link["file"]
-                    # })
+    # Pooled document: parsed once, closed by the pool (no leaked handles)
+    with open_document(file_path) as doc:
+        for page_number, page in enumerate(doc, start=1):
+
+            for link in page.get_links():
+
+                if link.get("kind") == 3 and "file" in link:  # /F link
+                    rect = fitz.Rect(link["from"])
+
+                    # extract the text shown to the user
+                    visible = page.get_text("text", clip=rect).strip()
+                    visible_lc = visible.lower()
+
+                    # check if any allowed text is inside the visible text
+                    if any(a in visible_lc for a in task_numbers):
+                        results.append({
+                            "visible_text": visible,
+                            "target_pdf": link["file"]
+                        })
+                        # results.append({
+                        #     "page": page_number,
+                        #     "visible_text": visible,
+                        #     "target_pdf": link["file"]
+                        # })
     pdf_links = []
     for r in results:
         path_pdf_MPP = r["target_pdf"].split("#")[0].split("../")[-1]
@@ -59,11 +65,82 @@ def extract_chapter(list_of_tasks:list)->str:
     return list_of_tasks[0].split("-")[0]   # e.g. for '32-00-01/200' it gets '32'
 
 
+def group_by_chapter(list_of_tasks:list)->dict:
+    """ Groups task numbers by their ATA chapter, e.g. {'21': [...], '36': [...]} (first-seen order)."""
+    groups = {}
+    for task in list_of_tasks:
+        chapter = task.strip().split("-")[0][:2]
+        groups.setdefault(chapter, []).append(task.strip())
+    return groups
+
+
 # ----------------------
 # Copy all PDF's to a single Directory
 # -----------------------
 
-def copy_pdf_list(pdf_paths, destination_dir, base_dir=None):
+DELIVERY_MODES = ("auto", "hardlink", "reflink", "symlink", "copy")
+FICLONE = 0x40049409    # Linux ioctl to clone (reflink) a file on btrfs/XFS
+
+
+def same_content(src, dst):
+    """ True if `dst` already holds `src` (same inode, or same size and MD5)."""
+    if not os.path.isfile(dst):
+        return False
+    if os.path.samefile(src, dst):
+        return True
+    return os.path.getsize(src) == os.path.getsize(dst) and file_md5(src) == file_md5(dst)
+
+
+def reflink(src, dst):
+    """ Copy-on-write clone of `src` (raises OSError if the filesystem cannot do it)."""
+    if platform.system() == "Darwin":
+        subprocess.run(["cp", "-c", src, dst], check=True, capture_output=True)
+        return
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+def deliver_file(src, dst, mode="auto"):
+    """
+    Places `src` at `dst` and returns the method used.
+        "hardlink": same file, no extra disk space (same filesystem only)
+        "reflink":  copy-on-write clone (btrfs, XFS, APFS)
+        "symlink":  link to the manual file (only when asked for explicitly)
+        "copy":     plain copy
+    mode="auto" tries hardlink, then reflink, then copy.
+    The file is built next to `dst` and moved into place, so readers never see a partial file.
+    """
+    if mode not in DELIVERY_MODES:
+        raise ValueError(f"Unknown delivery mode: {mode}")
+    attempts = ["hardlink", "reflink", "copy"] if mode == "auto" else [mode]
+
+    tmp = f"{dst}.tmp{os.getpid()}"
+    for method in attempts:
+        try:
+            if method == "hardlink":
+                os.link(src, tmp)
+            elif method == "reflink":
+                reflink(src, tmp)
+            elif method == "symlink":
+                os.symlink(src, tmp)
+            else:
+                shutil.copy(src, tmp)
+            os.replace(tmp, dst)
+            return method
+        except (OSError, subprocess.CalledProcessError):
+            if os.path.lexists(tmp):
+                os.remove(tmp)
+            if method == attempts[-1]:
+                raise
+
+
+def copy_pdf_list(pdf_paths, destination_dir, base_dir=None, mode="auto"):
     """
     Copies PDF files listed in `pdf_paths` into `destination_dir`.
 
@@ -79,10 +156,15 @@ def copy_pdf_list(pdf_paths, destination_dir, base_dir=None):
             Used to resolve relative paths.
             If None, uses current working directory.
 
+        mode (str):
+            How files are placed, see deliver_file ("auto" = hardlink, reflink or copy).
+            Files already present with the same content are left untouched.
+
     Returns:
         dict with:
             - "copied": list of copied file paths
             - "missing": list of missing file paths
+            - "delivery": {copied file path: "hardlink"/"reflink"/"symlink"/"copy"/"present"}
     """
 
     if base_dir is None:
@@ -93,14 +175,19 @@ def copy_pdf_list(pdf_paths, destination_dir, base_dir=None):
 
     copied = []
     missing = []
+    delivery = {}
 
     for path in pdf_paths:
         # Build absolute path
         abs_path = os.path.abspath(os.path.join(base_dir, path))
 
         if os.path.isfile(abs_path):
+            dst = os.path.join(destination_dir, os.path.basename(abs_path))
             try:
-                shutil.copy(abs_path, destination_dir)
+                if same_content(abs_path, dst):
+                    delivery[abs_path] = "present"
+                else:
+                    delivery[abs_path] = deliver_file(abs_path, dst, mode)
                 copied.append(abs_path)
             except Exception as e:
                 print(f"ERROR copying {abs_path}: {e}")
@@ -108,7 +195,89 @@ def copy_pdf_list(pdf_paths, destination_dir, base_dir=None):
         else:
             missing.append(abs_path)
 
-    return {"copied": copied, "missing": missing}
+    return {"copied": copied, "missing": missing, "delivery": delivery}
+
+
+# ----------------------
+# Slim PDFs with only the pages of the requested tasks
+# -----------------------
+
+def merge_page_ranges(page_ranges):
+    """ Sorted, non-overlapping (first, last) ranges, e.g. [(5, 12), (2, 4)] -> [(2, 12)]."""
+    merged = []
+    for first, last in sorted(page_ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def slim_pdf_name(pdf_path, page_ranges):
+    """ e.g. MPP1285_21-20-00-07-1.PDF + [(13, 18)] -> MPP1285_21-20-00-07-1_p13-18.PDF"""
+    stem, ext = os.path.splitext(os.path.basename(pdf_path))
+    pages = "_".join(f"p{first}-{last}" if first != last else f"p{first}" for first, last in page_ranges)
+    return f"{stem}_{pages}{ext}"
+
+
+def extract_pdf_pages(src, destination_dir, page_ranges):
+    """
+    Writes a copy of `src` with only the pages in `page_ranges` (1-based, inclusive)
+    into `destination_dir` and returns its path. Ranges covering the whole file
+    return None (deliver the original instead). An up-to-date slim file is reused.
+    """
+    with open_document(src) as doc:
+        page_ranges = merge_page_ranges((max(1, first), min(last, doc.page_count)) for first, last in page_ranges)
+        if page_ranges == [(1, doc.page_count)]:
+            return None
+        dst = os.path.join(destination_dir, slim_pdf_name(src, page_ranges))
+        if os.path.isfile(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            return dst
+
+        os.makedirs(destination_dir, exist_ok=True)
+        with fitz.open() as slim:
+            for first, last in page_ranges:
+                slim.insert_pdf(doc, from_page=first - 1, to_page=last - 1)
+            tmp = f"{dst}.tmp{os.getpid()}"
+            slim.save(tmp, garbage=3, deflate=True)
+    os.replace(tmp, dst)
+    return dst
+
+
+def extract_task_pdfs(page_ranges, destination_dir, base_dir=None, mode="auto"):
+    """
+    Delivers the task pages of every PDF in `page_ranges` ({pdf path: [(first, last)]}).
+
+    Returns the copy_pdf_list dict plus "extracted": {source path: slim PDF path};
+    files whose ranges cover every page are delivered whole through copy_pdf_list.
+    """
+    if base_dir is None:
+        base_dir = os.getcwd()
+
+    whole = []
+    extracted = {}
+    missing = []
+    for path, ranges in page_ranges.items():
+        abs_path = os.path.abspath(os.path.join(base_dir, path))
+        if not os.path.isfile(abs_path):
+            missing.append(abs_path)
+            continue
+        try:
+            dst = extract_pdf_pages(abs_path, destination_dir, ranges)
+        except Exception as e:
+            print(f"ERROR extracting pages of {abs_path}: {e}")
+            dst = None
+        if dst is None:
+            whole.append(path)
+        else:
+            extracted[abs_path] = dst
+
+    result = copy_pdf_list(whole, destination_dir, base_dir, mode)
+    result["copied"].extend(extracted)
+    result["delivery"].update({path: "extracted" for path in extracted})
+    result["missing"].extend(missing)
+    result["extracted"] = extracted
+    return result
 
 
 def main():
@@ -0,0 +1,186 @@
+# Persisted lookup of the task links in the chapter TOC PDFs (built once, no PDF parsing per request)
+import os
+import glob
+import sqlite3
+import threading
+
+import fitz  # PyMuPDF
+
+from fitz_pool import open_document
+from file_utils import file_md5
+
+from task_index import INDEX_FOLDER, find_codes, normalize_code
+
+LINK_INDEX_DB = os.path.join(INDEX_FOLDER, "toc_links.db")
+TOC_PATTERN = "PDF/025-MPP1285_{chapter}-TOC.PDF"
+
+
+def toc_path(chapter: str) -> str:
+    return TOC_PATTERN.format(chapter=chapter)
+
+
+def read_toc_links(file_path: str) -> list:
+    """ (visible_text, target_pdf) of every /F link in a TOC PDF (same rules as extract_links_by_text)."""
+    links = []
+    with open_document(file_path) as doc:
+        for page in doc:
+            for link in page.get_links():
+                if link.get("kind") == 3 and "file" in link:  # /F link
+                    visible = page.get_text("text", clip=fitz.Rect(link["from"])).strip()
+                    target = link["file"].split("#")[0].split("../")[-1]
+                    links.append((visible, target))
+    return links
+
+
+class LinkIndex:
+    """
+    SQLite table of every TOC link (chapter, code, visible text, target PDF),
+    loaded per chapter into dictionaries {code: [target_pdf]}.
+
+    A chapter is re-read from its TOC PDF only when the file's mtime changed
+    AND its MD5 differs from the one stored at build time.
+    """
+
+    def __init__(self, db_path: str = LINK_INDEX_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()     # guards the two dictionaries below
+        self._chapters = {}      # chapter -> (mtime, {code: [targets]}, [(visible_lc, target)])
+        self._chapter_locks = {}  # chapter -> lock held while that chapter is (re)built
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS toc_files (
+                chapter TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                mtime REAL NOT NULL,
+                md5 TEXT NOT NULL
+            )
+            """)
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS links (
+                chapter TEXT NOT NULL,
+                code TEXT,
+                visible_text TEXT NOT NULL,
+                target_pdf TEXT NOT NULL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS links_chapter_code ON links (chapter, code)")
+        conn.close()
+
+    # --------------------------
+    # Build / invalidation
+    # --------------------------
+    def build_chapter(self, chapter: str, conn):
+        path = toc_path(chapter)
+        rows = []
+        for visible, target in read_toc_links(path):
+            codes = find_codes(visible) or [None]
+            rows.extend((chapter, code, visible, target) for code in codes)
+
+        conn.execute("DELETE FROM links WHERE chapter = ?", (chapter,))
+        conn.executemany("INSERT INTO links (chapter, code, visible_text, target_pdf) VALUES (?, ?, ?, ?)", rows)
+        conn.execute("INSERT OR REPLACE INTO toc_files (chapter, path, mtime, md5) VALUES (?, ?, ?, ?)",
+                     (chapter, path, os.path.getmtime(path), file_md5(path)))
+        print(f"Link index: {len(rows)} links from {path}")
+
+    def build_all(self):
+        """ Indexes the links of every chapter TOC in PDF/ (one-time build)."""
+        with sqlite3.connect(self.db_path) as conn:
+            for path in sorted(glob.glob(TOC_PATTERN.format(chapter="*"))):
+                chapter = os.path.basename(path).split("_")[1].split("-")[0]
+                self.build_chapter(chapter, conn)
+        conn.close()
+        with self._lock:
+            self._chapters.clear()
+
+    def _refresh_chapter(self, chapter: str, mtime: float):
+        """ Brings the stored links of `chapter` up to date and loads them in memory."""
+        with sqlite3.connect(self.db_path) as conn:
+            stored = conn.execute("SELECT mtime, md5 FROM toc_files WHERE chapter = ?", (chapter,)).fetchone()
+            if stored is None or (stored[0] != mtime and stored[1] != file_md5(toc_path(chapter))):
+                self.build_chapter(chapter, conn)
+            elif stored[0] != mtime:
+                # touched but identical content: just remember the new mtime
+                conn.execute("UPDATE toc_files SET mtime = ? WHERE chapter = ?", (mtime, chapter))
+
+            rows = conn.execute("SELECT code, visible_text, target_pdf FROM links WHERE chapter = ?",
+                                (chapter,)).fetchall()
+        conn.close()
+
+        by_code = {}
+        for code, _, target in rows:
+            if code:
+                by_code.setdefault(code, []).append(target)
+        visible = [(text.lower(), target) for _, text, target in rows]
+        return mtime, by_code, visible
+
+    def _chapter(self, chapter: str):
+        path = toc_path(chapter)
+        if not os.path.isfile(path):
+            return None
+        mtime = os.path.getmtime(path)
+        cached = self._chapters.get(chapter)
+        if cached is not None and cached[0] == mtime:
+            return cached
+
+        # Per-chapter lock: a chapter being built never blocks lookups in the other chapters
+        with self._lock:
+            chapter_lock = self._chapter_locks.setdefault(chapter, threading.Lock())
+        with chapter_lock:
+            cached = self._chapters.get(chapter)
+            if cached is None or cached[0] != mtime:
+                cached = self._refresh_chapter(chapter, mtime)
+                with self._lock:
+                    self._chapters[chapter] = cached
+            return cached
+
+    # --------------------------
+    # Lookup
+    # --------------------------
+    def resolve(self, chapter: str, task_numbers: list) -> dict:
+        """ {task: [target PDF paths relative to PDF/]} for `task_numbers` in `chapter` ([] if not linked)."""
+        cached = self._chapter(chapter)
+        if cached is None:
+            print(f"No TOC found for chapter {chapter}: {toc_path(chapter)}")
+            return {task: [] for task in task_numbers}
+        _, by_code, visible = cached
+
+        resolved = {}
+        for task in task_numbers:
+            code = normalize_code(task)
+            if code in by_code:
+                resolved[task] = list(dict.fromkeys(by_code[code]))
+            else:
+                # not a code we can normalize: fall back to the visible-text match
+                resolved[task] = list(dict.fromkeys(target for text, target in visible if task.lower() in text))
+        return resolved
+
+    def lookup(self, chapter: str, task_numbers: list) -> list:
+        """
+        Target PDF paths (relative to PDF/) of the TOC links of `task_numbers` in `chapter`,
+        the same paths extract_links_by_text returns but from dictionary lookups.
+        """
+        resolved = self.resolve(chapter, task_numbers)
+        return list(dict.fromkeys(target for targets in resolved.values() for target in targets))
+
+
+_LINK_INDEX = None
+_LINK_INDEX_LOCK = threading.Lock()
+
+
+def get_link_index() -> LinkIndex:
+    """ Process-wide LinkIndex (chapters are indexed on first use if not built)."""
+    global _LINK_INDEX
+    if _LINK_INDEX is None:
+        with _LINK_INDEX_LOCK:
+            if _LINK_INDEX is None:
+                _LINK_INDEX = LinkIndex()
+    return _LINK_INDEX
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    get_link_index().build_all()
@@ -0,0 +1,112 @@
+# Structural (task / sub-section) splitter for MPP manual pages
+import re
+from bisect import bisect_right
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Page header and footer repeated on every MPP page, e.g.
+#   "AIRCRAFT MAINTENANCE MANUAL" ... "EMB-145  - AMM 1285 100-801-A/700 CONFIG-1 21-20-00
+#    Page 2 of 18 Rev 48 - Oct 30/15 Copyright (c) by Embraer S.A. All rights reserved - See title page for details."
+PAGE_HEADER = re.compile(r"^\s*AIRCRAFT MAINTENANCE MANUAL\s*")
+PAGE_FOOTER = re.compile(
+    r"EMB-1[34]5\s+-\s+AMM\s+\d{4}.{0,200}?Page\s+\d+\s+of\s+\d+\s+Rev\s+\d+\s+-\s+\w{3}\s+\d{2}/\d{2}"
+    r"(?:\s*Copyright.{0,20}?Embraer S\.A\.\s*All rights reserved\s*-\s*See title page for details\.)?",
+    re.DOTALL
+)
+
+TASK_NUMBER = r"\d{2}-\d{2}-\d{2}-\d{3}-\d{3}-[A-Z]"
+# Start of a task procedure ("TASK 21-20-00-100-801-A EFFECTIVITY: ..."), not a reference
+# ("AMM TASK 21-...-A/400", "Refer to FIM TASK 21-...-A")
+TASK_HEADING = re.compile(rf"\bTASK\s+({TASK_NUMBER})(?=\s+EFFECTIVITY)")
+# Lettered sub-section of a task ("B. References", "J. Cleaning")
+SUB_SECTION = re.compile(r"(?:(?<=\s)|^)([A-Z])\.\s+(?=[A-Z][a-z])")
+
+
+def strip_page_boilerplate(text: str) -> str:
+    """ Removes the MPP page header and footer from one page of text."""
+    text = PAGE_HEADER.sub("", text)
+    return PAGE_FOOTER.sub(" ", text).strip()
+
+
+class MPPTaskSplitter:
+    """
+    Splits MPP documents by task and lettered sub-section instead of at fixed
+    character counts.
+
+    Pages of the same source are joined (without their headers and footers),
+    cut at every "TASK <number>" heading and then at sub-sections; consecutive
+    small sub-sections of the same task are packed up to `chunk_size`
+    characters and only oversize ones fall back to a recursive split.
+    Every chunk keeps the source metadata of its first page plus "task_number".
+    """
+
+    def __init__(self, chunk_size: int = 2000, chunk_overlap: int = 100):
+        self.chunk_size = chunk_size
+        self.fallback = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    def split_documents(self, docs: list) -> list:
+        # Group consecutive pages by source file (loaders yield one file's pages in order)
+        chunks = []
+        group = []
+        for doc in docs:
+            if group and doc.metadata.get("source") != group[0].metadata.get("source"):
+                chunks.extend(self._split_source(group))
+                group = []
+            group.append(doc)
+        if group:
+            chunks.extend(self._split_source(group))
+        return chunks
+
+    # --------------------------
+    # Internals
+    # --------------------------
+    def _split_source(self, pages: list) -> list:
+        # Join the cleaned pages, remembering where each page starts
+        parts, starts, offset = [], [], 0
+        for page in pages:
+            text = strip_page_boilerplate(page.page_content)
+            starts.append(offset)
+            parts.append(text)
+            offset += len(text) + 1
+        text = " ".join(parts)
+
+        def page_metadata(position: int) -> dict:
+            return dict(pages[bisect_right(starts, position) - 1].metadata)
+
+        chunks = []
+        for start, end, task_number in self._task_spans(text):
+            for section_start, section_text in self._pack_sections(text, start, end):
+                metadata = page_metadata(section_start)
+                metadata["task_number"] = task_number
+                if len(section_text) > self.chunk_size:
+                    pieces = self.fallback.split_text(section_text)
+                else:
+                    pieces = [section_text]
+                chunks.extend(Document(page_content=piece, metadata=dict(metadata)) for piece in pieces)
+        return chunks
+
+    @staticmethod
+    def _task_spans(text: str) -> list:
+        """ (start, end, task_number) spans; text before the first task gets task_number None."""
+        headings = list(TASK_HEADING.finditer(text))
+        spans = []
+        first = headings[0].start() if headings else len(text)
+        if text[:first].strip():
+            spans.append((0, first, None))
+        for i, heading in enumerate(headings):
+            end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+            spans.append((heading.start(), end, heading.group(1)))
+        return spans
+
+    def _pack_sections(self, text: str, start: int, end: int) -> list:
+        """ Sub-sections of text[start:end] packed into pieces of up to chunk_size characters."""
+        cuts = [start] + [m.start() for m in SUB_SECTION.finditer(text, start, end) if m.start() > start] + [end]
+        packed = []
+        piece_start = cuts[0]
+        for i in range(1, len(cuts)):
+            if cuts[i] - piece_start > self.chunk_size and cuts[i - 1] > piece_start:
+                packed.append((piece_start, text[piece_start:cuts[i - 1]].strip()))
+                piece_start = cuts[i - 1]
+        packed.append((piece_start, text[piece_start:end].strip()))
+        return [(s, t) for s, t in packed if t]
@@ -0,0 +1,113 @@
+# Readers for the MPP XML files shipped next to every manual PDF
+import os
+import glob
+import xml.etree.ElementTree as ET
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+MPP_ROOT = "PDF/AMM_PART2_1285"      # manual root, one CHAPTER_xx folder per ATA chapter
+TREE_FILE = "XML/ADM_AMM_1285_TREE.xml"   # chapter folders and their descriptions
+
+# Revision status of a file in the <file chg=...> attribute
+CHG_UNCHANGED = "U"
+CHG_REVISED = "R"
+CHG_NEW = "N"
+CHG_DELETED = "D"
+
+
+def read_file_info(xml_path: str) -> dict:
+    """
+    Reads the <file> header of an MPP XML file without parsing its pages.
+
+    Returns dict with:
+        - "id": document id, e.g. "MPP1285_21-20-00-07-1"
+        - "chg": revision status (U/R/N/D)
+        - "hash": MD5 of the matching PDF
+        - "title", "path" (e.g. "/CHAPTER_21"), "xml_path"
+    """
+    info = {"id": None, "chg": None, "hash": None, "title": None, "path": None,
+            "xml_path": xml_path}
+
+    with open(xml_path, "rb") as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "metadata":
+                    info["id"] = elem.get("id")
+                elif elem.tag == "file":
+                    info["chg"] = elem.get("chg")
+                continue
+
+            if elem.tag in ("title", "path", "hash"):
+                info[elem.tag] = (elem.text or "").strip()
+            elif elem.tag == "file":
+                break   # header done, pages are not needed
+
+    return info
+
+
+def find_xml_for(pdf_path: str, root: str = MPP_ROOT):
+    """ Path of the XML describing `pdf_path` (same folder first, then the chapter folders)."""
+    doc_id = os.path.splitext(os.path.basename(pdf_path))[0]
+
+    sibling = os.path.join(os.path.dirname(pdf_path), doc_id + ".xml")
+    if os.path.isfile(sibling):
+        return sibling
+
+    matches = glob.glob(os.path.join(root, "CHAPTER_*", doc_id + ".xml"))
+    return matches[0] if matches else None
+
+
+def read_chapter_tree(tree_path: str = TREE_FILE) -> dict:
+    """ {folder label: description} from the manual tree, e.g. {"CHAPTER_21": "21 Air Conditioning"}."""
+    root = ET.parse(tree_path).getroot()
+    return {folder.get("label"): folder.get("desc") for folder in root.iter("folder")}
+
+
+def chapter_xml_files(chapter=None, root: str = MPP_ROOT) -> list:
+    """ Sorted XML files of one chapter (e.g. "21") or of the whole manual."""
+    folder = f"CHAPTER_{chapter}" if chapter else "CHAPTER_*"
+    return sorted(glob.glob(os.path.join(root, folder, "*.xml")))
+
+
+class MPPXMLLoader(BaseLoader):
+    """
+    Loads the per-page text of an MPP XML file (<page number=...><data>) as
+    one Document per page, streaming the file with iterparse.
+
+    Metadata mirrors PyPDFLoader ("source", 0-based "page") plus "page_number",
+    "file_id", "title", "path" and "chg" from the <file> header.
+    "source" is the PDF next to the XML, so both loaders point at the same file.
+    """
+
+    def __init__(self, xml_path: str):
+        self.xml_path = xml_path
+
+    def lazy_load(self):
+        header = {"file_id": None, "title": None, "path": None, "chg": None}
+        source = os.path.splitext(self.xml_path)[0] + ".PDF"
+
+        with open(self.xml_path, "rb") as f:
+            try:
+                for event, elem in ET.iterparse(f, events=("start", "end")):
+                    if event == "start":
+                        if elem.tag == "metadata":
+                            header["file_id"] = elem.get("id")
+                        elif elem.tag == "file":
+                            header["chg"] = elem.get("chg")
+                        continue
+
+                    if elem.tag in ("title", "path"):
+                        header[elem.tag] = (elem.text or "").strip()
+                    elif elem.tag == "page":
+                        number = int(elem.get("number"))
+                        text = elem.findtext("data") or ""
+                        elem.clear()    # keeps memory flat on large files
+                        yield Document(
+                            page_content=text,
+                            metadata={"source": source, "page": number - 1, "page_number": number,
+                                      **header}
+                        )
+            except ET.ParseError as e:
+                # A few shipped XML files are truncated: keep the pages read so far
+                print(f"WARNING: {self.xml_path} is incomplete ({e}), pages after the error are skipped.")
@@ -0,0 +1,150 @@
+# Per-session package folders in PDF/AMM_EXTRACTED with a disk quota, LRU eviction and a manifest
+import os
+import re
+import json
+import stat
+import time
+import shutil
+import threading
+
+EXTRACTED_ROOT = "/Users/fernandocuriel/PycharmProjects/RAG/PDF/AMM_EXTRACTED"
+PACKAGE_MANIFEST = "manifest.json"
+SHARED_SESSION = "shared"                  # package of callers without a user / session
+DISK_QUOTA_MB = float(os.getenv("AMM_EXTRACTED_QUOTA_MB", "2048"))   # all packages together
+
+
+def safe_name(session_id: str) -> str:
+    """ Folder name for a user / session id (no path separators or odd characters)."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(session_id)).strip(".") or "anonymous"
+
+
+def folder_size(path: str) -> int:
+    """
+    Disk space the folder's files take on their own: symlinks and hardlinked files
+    (delivered as links to the manual, deleting them frees nothing) are not counted.
+    """
+    size = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                st = os.lstat(os.path.join(folder, name))
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode) and st.st_nlink == 1:
+                size += st.st_size
+    return size
+
+
+class PackageStore:
+    """
+    One package folder per user or Streamlit session under EXTRACTED_ROOT
+    (<root>/<session>/<chapter>/*.PDF, work packages in <root>/<session>/).
+
+    manifest.json keeps, per package: its files, size, creation and last
+    access time. When the packages together exceed `quota_mb`, the least
+    recently accessed ones are deleted (never the one just written).
+    The manifest is re-read only when its file changed on disk.
+    """
+
+    def __init__(self, root: str = EXTRACTED_ROOT, quota_mb: float = DISK_QUOTA_MB):
+        self.root = root
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.manifest_path = os.path.join(root, PACKAGE_MANIFEST)
+        self._lock = threading.RLock()
+        self._manifest = None
+        self._manifest_mtime = None
+
+    # --------------------------
+    # Manifest
+    # --------------------------
+    def _load(self) -> dict:
+        mtime = os.path.getmtime(self.manifest_path) if os.path.isfile(self.manifest_path) else None
+        if self._manifest is None or mtime != self._manifest_mtime:
+            if mtime is None:
+                self._manifest = {}
+            else:
+                with open(self.manifest_path) as f:
+                    self._manifest = json.load(f)
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f"{self.manifest_path}.tmp{os.getpid()}"
+        with open(tmp, "w") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+        self._manifest_mtime = os.path.getmtime(self.manifest_path)
+
+    # --------------------------
+    # Packages
+    # --------------------------
+    def package_dir(self, session_id: str, chapter: str = None) -> str:
+        """ Folder of a session's package (or of one chapter inside it)."""
+        path = os.path.join(self.root, safe_name(session_id))
+        return os.path.join(path, chapter) if chapter else path
+
+    def record(self, session_id: str, files: list) -> dict:
+        """ Adds `files` to the session's package entry, marks it accessed and enforces the quota."""
+        name = safe_name(session_id)
+        with self._lock:
+            manifest = self._load()
+            now = time.time()
+            entry = manifest.setdefault(name, {"created": now, "files": []})
+            package = self.package_dir(session_id)
+            for path in files:
+                relative = os.path.relpath(path, package)
+                if relative not in entry["files"]:
+                    entry["files"].append(relative)
+            entry["files"] = [f for f in entry["files"] if os.path.isfile(os.path.join(package, f))]
+            entry["size"] = folder_size(package)
+            entry["last_access"] = now
+            self._evict(keep=name)
+            self._save()
+            return entry
+
+    def touch(self, session_id: str):
+        """ Marks the session's package as accessed (e.g. listed or downloaded)."""
+        name = safe_name(session_id)
+        with self._lock:
+            manifest = self._load()
+            if name in manifest:
+                manifest[name]["last_access"] = time.time()
+                self._save()
+
+    def files(self, session_id: str) -> list:
+        """ Files of the session's package (paths relative to its folder), from the manifest."""
+        with self._lock:
+            entry = self._load().get(safe_name(session_id))
+            return list(entry["files"]) if entry else []
+
+    def total_size(self) -> int:
+        with self._lock:
+            return sum(entry.get("size", 0) for entry in self._load().values())
+
+    def _evict(self, keep: str = None):
+        """ Deletes least recently accessed packages until the total size fits in the quota."""
+        manifest = self._manifest
+        total = sum(entry.get("size", 0) for entry in manifest.values())
+        for name in sorted(manifest, key=lambda n: manifest[n].get("last_access", 0)):
+            if total <= self.quota_bytes:
+                break
+            if name == keep:
+                continue
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+            total -= manifest.pop(name).get("size", 0)
+            print(f"Evicted package {name} (disk quota {self.quota_bytes // (1024 * 1024)} MB)")
+
+
+_STORE = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_package_store() -> PackageStore:
+    """ Process-wide PackageStore shared by all sessions."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = PackageStore()
+    return _STORE
@@ -0,0 +1,151 @@
+# SQLite FTS5 keyword index over every page of the MPP XML corpus (no embeddings, no API call)
+import os
+import re
+import sqlite3
+import argparse
+import threading
+
+from mpp_xml import MPP_ROOT, chapter_xml_files, read_file_info
+from mpp_splitter import strip_page_boilerplate
+from task_index import INDEX_FOLDER, _page_texts
+
+PAGE_INDEX_DB = os.path.join(INDEX_FOLDER, "pages.db")
+SNIPPET_TOKENS = 16
+QUERY_TERM = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def chapter_of_xml(xml_path: str) -> str:
+    """ "21" for .../CHAPTER_21/MPP1285_21-20-00-07-1.xml"""
+    folder = os.path.basename(os.path.dirname(xml_path))
+    return folder.split("_")[-1] if folder.startswith("CHAPTER_") else ""
+
+
+def match_query(text: str) -> str:
+    """
+    FTS5 MATCH expression for free text: every word (or "quoted phrase") must
+    appear, as a phrase, so part numbers, placards and error messages such as
+    21-20-00-100-805-A, P/N 145-12345 or "DUCT OVHT" need no FTS syntax.
+    """
+    terms = []
+    for phrase, word in QUERY_TERM.findall(text):
+        term = (phrase or word).replace('"', "")
+        if re.search(r"\w", term):
+            terms.append(f'"{term}"')
+    return " ".join(terms)
+
+
+# --------------------------
+# Build (offline)
+# --------------------------
+def build_page_index(root: str = MPP_ROOT, db_path: str = PAGE_INDEX_DB) -> int:
+    """ (Re)builds the FTS5 table with one row per manual page and returns the number of pages."""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    tmp = f"{db_path}.tmp{os.getpid()}"
+    if os.path.exists(tmp):
+        os.remove(tmp)
+
+    conn = sqlite3.connect(tmp)
+    conn.execute("""
+    CREATE VIRTUAL TABLE pages USING fts5 (
+        file_id, chapter UNINDEXED, title, page UNINDEXED, pdf UNINDEXED, text,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """)
+    rows = 0
+    for xml_path in chapter_xml_files(root=root):
+        info = read_file_info(xml_path)
+        pdf = os.path.relpath(os.path.splitext(xml_path)[0] + ".PDF", os.path.dirname(root))
+        pages = [(info["id"], chapter_of_xml(xml_path), info["title"], number, pdf, strip_page_boilerplate(text))
+                 for number, text in _page_texts(xml_path)]
+        conn.executemany("INSERT INTO pages (file_id, chapter, title, page, pdf, text) VALUES (?, ?, ?, ?, ?, ?)",
+                         pages)
+        rows += len(pages)
+    conn.execute("INSERT INTO pages (pages) VALUES ('optimize')")
+    conn.commit()
+    conn.close()
+
+    os.replace(tmp, db_path)
+    print(f"Page index: {rows} pages saved in {db_path}")
+    return rows
+
+
+# --------------------------
+# Search
+# --------------------------
+class PageSearch:
+    """ Ranked (BM25) keyword search over the page index with highlighted snippets."""
+
+    def __init__(self, db_path: str = PAGE_INDEX_DB):
+        if not os.path.isfile(db_path):
+            build_page_index(db_path=db_path)
+        self.db_path = db_path
+        self._local = threading.local()     # one read connection per thread
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        return conn
+
+    def search(self, text: str, limit: int = 10, chapter: str = None, highlight=("**", "**")) -> list:
+        """
+        Best pages for `text`: [{"file_id", "chapter", "title", "page", "pdf", "snippet", "score"}],
+        `highlight` wraps the matched words in the snippet.
+        """
+        query = match_query(text)
+        if not query:
+            return []
+        sql = ("SELECT file_id, chapter, title, page, pdf, "
+               "snippet(pages, 5, ?, ?, ' … ', ?), bm25(pages, 2.0, 0.0, 1.0, 0.0, 0.0, 1.0) AS score "
+               "FROM pages WHERE pages MATCH ?")
+        params = [highlight[0], highlight[1], SNIPPET_TOKENS, query]
+        if chapter:
+            sql += " AND chapter = ?"
+            params.append(str(chapter).zfill(2))
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        keys = ("file_id", "chapter", "title", "page", "pdf", "snippet", "score")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+def format_search_results(results: list) -> str:
+    """ Markdown list of search hits (the answer of the search_manual tool)."""
+    if not results:
+        return "No manual pages found."
+    return "\n".join(f"- **{r['file_id']}** page {r['page']} ({r['title']}): {r['snippet']}" for r in results)
+
+
+_SEARCH = None
+_SEARCH_LOCK = threading.Lock()
+
+
+def get_page_search() -> PageSearch:
+    """ Process-wide PageSearch (the index is built on first use if missing)."""
+    global _SEARCH
+    if _SEARCH is None:
+        with _SEARCH_LOCK:
+            if _SEARCH is None:
+                _SEARCH = PageSearch()
+    return _SEARCH
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Full-text search of the MPP manual pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("build", help="(re)build the page index from the XML corpus")
+    search_cmd = commands.add_parser("search", help="search the page index")
+    search_cmd.add_argument("text", help='words or "quoted phrases", e.g. 21-20-00-100-805-A or "DUCT OVHT"')
+    search_cmd.add_argument("--chapter", help="only pages of this ATA chapter, e.g. 21")
+    search_cmd.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_page_index()
+    else:
+        for hit in get_page_search().search(args.text, args.limit, args.chapter, highlight=("\033[1;33m", "\033[0m")):
+            print(f"{hit['file_id']}  p.{hit['page']}  [{hit['title']}]\n    {hit['snippet']}\n")
@@ -32,10 +32,11 @@ def find_task_prompt(component_system, context):
         aircraft maintenance manual as Context.
 
         Use your knowledge, the aircraft components, and the context to
-        list all the task codes and its brief descriptions as a 
-        friendly looking table. 
+        list all the tasks relevant to the components. For each task give
+        its task code (e.g. 21-51-01-000-801-A), a brief description and
+        its ATA chapter (e.g. 21). Also return every task code in task_codes.
 
-        At the end of your response print ONLY the task codes as a python list.
+        ONLY list task codes found in the Context.
 
         Components:
         {component_system}
@@ -63,6 +64,20 @@ def diagnose_prompt(user_question, context):
     return diagnose_symptoms
 
 
+# Component selection (GRAPH pipeline: diagnosis -> find_tasks)
+def select_component_prompt(diagnosis):
+    select_component = f"""You are an experienced aircraft technician.
+
+            From the diagnosis below, identify the ONE aircraft system or component
+            most likely responsible for the failure. Answer ONLY with its name,
+            e.g. "air cycle machine", without any other text.
+
+            Diagnosis:
+            {diagnosis}
+            """
+    return select_component
+
+
 USER_WELCOME = """
     \n--------------------------------------------------------------------
         Welcome to AMTMan-E145, the AI Aircraft Maintenance Task Manager! 
@@ -119,6 +134,10 @@ You have access to the following tools:
    - Use this tool when the user asks for maintenance tasks, task numbers, procedures,
      or work instructions related to specific aircraft systems or components.
 
+3. search_manual  
+   - Use this tool when the user asks where an exact text appears in the manual:
+     part numbers, placards, error messages or other literal strings.
+
 --------------------------------------------------
 RULES OF OPERATION (STRICT)
 --------------------------------------------------
@@ -129,6 +148,11 @@ RULES OF OPERATION (STRICT)
   2) Present the results of find_tasks without further explanation 
   4) STOP
 
+• If the first tool chosen is search_manual:
+  1) Call search_manual
+  2) Present the results of search_manual without further explanation
+  3) STOP
+
 • If the first tool chosen is symptoms_rag:
   1) Call symptoms_rag
   2) Identify ONE aircraft system or component from the answer
@@ -142,7 +166,7 @@ STOP CONDITION (CRITICAL)
 --------------------------------------------------
 
 The stop condition is met IMMEDIATELY when
-find_tasks returns any output.
+find_tasks or search_manual returns any output.
 
 Once this happens:
 • Output ONLY the tool response
@@ -156,7 +180,7 @@ OVERALL GOAL
 
 Correctly route the user’s query,
 use the required tools exactly once,
-and make sure to terminate as soon as find_tasks returns any output.
+and make sure to terminate as soon as find_tasks or search_manual returns any output.
 
 
 """
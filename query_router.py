@@ -0,0 +1,227 @@
+# Local pre-router: picks the agent tool for clear-cut queries without the routing LLM call
+import os
+import re
+import json
+import math
+import time
+import threading
+from dataclasses import dataclass, asdict
+
+from task_index import find_codes
+
+ROUTER_LOG = os.path.join("database", "router_stats.jsonl")
+CONFIDENCE_THRESHOLD = 0.65      # rules: best tool at least 2 keyword votes ahead
+CENTROID_MARGIN = 0.05           # centroids: cosine margin between the two tools needed to skip the LLM
+
+# Keyword rules (prefixes, lower case) per tool
+FIND_TASK_WORDS = ("remov", "install", "inspect", "servic", "replac", "task", "procedure", "adjust", "test",
+                   "check", "clean", "lubricat", "repair", "rigging", "pageblock", "subtask", "mpp")
+SYMPTOM_WORDS = ("fail", "fault", "warning", "caution", "message", "leak", "nois", "vibrat", "smell",
+                 "smoke", "inop", "intermittent", "overheat", "hot ", "cold ", "does not", "doesn't", "won't",
+                 "not work", "erratic", "fluctuat", "low pressure", "high pressure", "flicker", "symptom",
+                 "diagnos", "cause", "trouble", "stuck", "jammed", "slow")
+SEARCH_PATTERNS = re.compile(r'"[^"]{3,}"|\bP/N\b|\bpart number\b|\bplacard\b|\bwhere (?:is|does)\b.*\bmention',
+                             re.IGNORECASE)
+# Literal text handed to search_manual: "quoted text" or the number after P/N / part number
+SEARCH_LITERALS = re.compile(r'"([^"]{3,})"|\b(?:P/N|part number)\s*:?\s*([A-Za-z0-9][\w./-]*\d[\w./-]*)',
+                             re.IGNORECASE)
+
+# Example queries per tool for the nearest-centroid stage (the USER_WELCOME examples and similar ones)
+ROUTE_EXAMPLES = {
+    "find_tasks": [
+        "air cycle machine, bleed air valve",
+        "nose landing gear. Only inspection tasks",
+        "air cycle machine. List only the removal tasks",
+        "pack valve removal and installation",
+        "main landing gear wheel and brake",
+        "engine oil servicing",
+    ],
+    "symptoms_rag": [
+        "Hot air in passenger cabin.",
+        "Aircraft vibrates during takeoff run.",
+        "Pack 1 fails to start and the cabin gets warm",
+        "Smoke smell in the cockpit after engine start",
+        "Hydraulic pressure fluctuates in flight",
+        "Landing gear does not retract",
+    ],
+}
+
+
+@dataclass
+class RouteDecision:
+    tool: str               # best local guess ("find_tasks", "symptoms_rag", "search_manual") or None
+    confidence: float       # 0..1; at or above the threshold the routing LLM call is skipped
+    method: str             # "rules", "centroid" or "none"
+    latency_ms: float
+    argument: str = None    # tool input: the query, or the literal text for search_manual
+
+    @property
+    def confident(self) -> bool:
+        return self.tool is not None and self.confidence >= CONFIDENCE_THRESHOLD
+
+
+def rule_scores(query: str) -> dict:
+    """ Keyword votes per tool."""
+    text = f" {query.lower()} "
+    scores = {"find_tasks": 0.0, "symptoms_rag": 0.0, "search_manual": 0.0}
+    if find_codes(query):
+        scores["find_tasks"] += 3.0      # a task code or pageblock is decisive
+    scores["find_tasks"] += sum(1.0 for w in FIND_TASK_WORDS if re.search(rf"\b{re.escape(w)}", text))
+    scores["symptoms_rag"] += sum(1.0 for w in SYMPTOM_WORDS if re.search(rf"\b{re.escape(w)}", text))
+    scores["search_manual"] += 2.0 * len(SEARCH_PATTERNS.findall(query))
+    return scores
+
+
+def search_literals(query: str) -> str:
+    """ The quoted strings / part numbers of a query, as search_manual text ("" if none)."""
+    return " ".join(f'"{quoted}"' if quoted else number for quoted, number in SEARCH_LITERALS.findall(query))
+
+
+def centroid_confidence(margin: float) -> float:
+    """
+    Confidence of a nearest-centroid guess from the cosine margin between the two
+    tools: a margin of CENTROID_MARGIN (a clear preference) reaches CONFIDENCE_THRESHOLD.
+    """
+    return max(0.0, min(1.0, 0.5 + (CONFIDENCE_THRESHOLD - 0.5) * margin / CENTROID_MARGIN))
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    return dot / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)) or 1.0)
+
+
+class QueryRouter:
+    """
+    Picks a tool locally, in two stages:
+        1) keyword rules (task codes, "remove"/"install"/"inspection", symptom words, quoted text);
+           confidence grows with the margin between the best and the second tool
+        2) if the rules are not sure: nearest centroid of the embedded ROUTE_EXAMPLES
+           (cached embeddings; skipped when embeddings are not available)
+    Below CONFIDENCE_THRESHOLD the caller falls back to the LLM router.
+    `argument` is the tool input: the query itself, or for search_manual only
+    the quoted text / part number found in it.
+    """
+
+    def __init__(self, embeddings=None, use_embeddings: bool = True):
+        self._embeddings = embeddings
+        self._use_embeddings = use_embeddings
+        self._centroids = None
+        self._lock = threading.Lock()
+
+    def _centroid_vectors(self):
+        if self._centroids is None:
+            with self._lock:
+                if self._centroids is None:
+                    if self._embeddings is None:
+                        from embedding_cache import CachedEmbeddings
+                        self._embeddings = CachedEmbeddings()
+                    centroids = {}
+                    for tool, examples in ROUTE_EXAMPLES.items():
+                        vectors = self._embeddings.embed_documents(examples)
+                        centroids[tool] = [sum(column) / len(vectors) for column in zip(*vectors)]
+                    self._centroids = centroids
+        return self._centroids
+
+    def centroid_route(self, query: str):
+        """ (tool, confidence) of the nearest example centroid, or (None, 0.0) without embeddings."""
+        try:
+            centroids = self._centroid_vectors()
+            vector = self._embeddings.embed_query(query)
+        except Exception as e:
+            # this query only (e.g. a transient network error): the next one tries again
+            print(f"Pre-router: centroid stage unavailable ({e})")
+            return None, 0.0
+        similarities = sorted(((_cosine(vector, c), tool) for tool, c in centroids.items()), reverse=True)
+        (best, tool), (second, _) = similarities[0], similarities[1]
+        return tool, centroid_confidence(best - second)
+
+    def route(self, query: str) -> RouteDecision:
+        start = time.perf_counter()
+        scores = rule_scores(query)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (tool, best), (_, second) = ranked[0], ranked[1]
+        if best > 0:
+            margin = best - second
+            decision = RouteDecision(tool, margin / (margin + 1.0) if margin else 0.0, "rules", 0.0)
+        else:
+            decision = RouteDecision(None, 0.0, "none", 0.0)
+
+        if not decision.confident and self._use_embeddings:
+            centroid_tool, confidence = self.centroid_route(query)
+            if centroid_tool is not None and (confidence > decision.confidence or decision.tool is None):
+                decision = RouteDecision(centroid_tool, confidence, "centroid", 0.0)
+
+        # search_manual needs every word of its input on the page: pass only the literal the
+        # rule matched, never the whole sentence (no literal: leave the query to the LLM)
+        decision.argument = query
+        if decision.tool == "search_manual":
+            decision.argument = search_literals(query)
+            if not decision.argument:
+                decision.confidence = 0.0
+        decision.latency_ms = (time.perf_counter() - start) * 1000
+        return decision
+
+
+# --------------------------
+# Statistics
+# --------------------------
+_LOG_LOCK = threading.Lock()
+
+
+def log_route(query: str, decision: RouteDecision, llm_tool: str = None, llm_route_ms: float = None,
+              log_path: str = ROUTER_LOG):
+    """
+    Appends one routing record. For LLM fallbacks, `llm_tool` is the tool the model
+    chose and `llm_route_ms` the time it took, which measures the local guess and
+    the time a confident local route saves.
+    """
+    record = {"time": time.time(), "query": query, **asdict(decision), "skipped_llm": decision.confident,
+              "llm_tool": llm_tool, "llm_route_ms": llm_route_ms}
+    os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+    with _LOG_LOCK, open(log_path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def router_stats(log_path: str = ROUTER_LOG) -> dict:
+    """ Share of queries routed locally, local-guess accuracy against the LLM, latencies and time saved."""
+    if not os.path.isfile(log_path):
+        return {}
+    with open(log_path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    local = [r for r in records if r["skipped_llm"]]
+    fallback = [r for r in records if not r["skipped_llm"] and r["llm_tool"]]
+    judged = [r for r in fallback if r["tool"]]
+    llm_ms = [r["llm_route_ms"] for r in fallback if r["llm_route_ms"] is not None]
+    avg_llm_ms = sum(llm_ms) / len(llm_ms) if llm_ms else 0.0
+    return {
+        "queries": len(records),
+        "routed_locally": len(local),
+        "local_share": len(local) / len(records) if records else 0.0,
+        "guess_accuracy_on_fallbacks": sum(r["tool"] == r["llm_tool"] for r in judged) / len(judged) if judged else None,
+        "avg_local_route_ms": sum(r["latency_ms"] for r in records) / len(records) if records else 0.0,
+        "avg_llm_route_ms": avg_llm_ms,
+        "estimated_time_saved_s": len(local) * avg_llm_ms / 1000,
+    }
+
+
+_ROUTER = None
+_ROUTER_LOCK = threading.Lock()
+
+
+def get_query_router() -> QueryRouter:
+    global _ROUTER
+    if _ROUTER is None:
+        with _ROUTER_LOCK:
+            if _ROUTER is None:
+                _ROUTER = QueryRouter()
+    return _ROUTER
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    router = QueryRouter(use_embeddings=False)
+    for example in ROUTE_EXAMPLES["find_tasks"] + ROUTE_EXAMPLES["symptoms_rag"] + ['Where is "DUCT OVHT" mentioned?']:
+        print(f"{example!r:60} -> {router.route(example)}")
+    print(json.dumps(router_stats(), indent=2))
@@ -0,0 +1,138 @@
+# Process-wide RAG engine
+import threading
+
+# Self-made libraries
+from find_tasks_efficient import load_rag_components, FAISS_FOLDER, TaskList
+from symptoms_RAG import setup_rag_components
+from chapter_shards import ShardedRetriever, available_shards
+from hybrid_retriever import BM25Index, HybridRetriever
+
+
+class RAGEngine:
+    """
+    Long-lived owner of the MPP task and diagnosis vector stores, their
+    retrievers and the OpenAI clients. Created once per process and shared
+    by every Streamlit session, so the FAISS indexes are deserialized only
+    at warm-up or reload.
+    """
+
+    def __init__(self, faiss_folder: str = FAISS_FOLDER):
+        self.faiss_folder = faiss_folder
+        self._lock = threading.RLock()
+        self._retriever = None
+        self._model = None
+        self._task_list_model = None
+        self._symptoms_retriever = None
+        self._symptoms_model = None
+        self._sharded = None
+        self._hybrid = None
+
+    # --------------------------
+    # Lifecycle
+    # --------------------------
+    def is_loaded(self) -> bool:
+        return self._retriever is not None
+
+    def warm_up(self):
+        """ Loads the components if not already loaded. Safe to call many times."""
+        if not self.is_loaded():
+            with self._lock:
+                if not self.is_loaded():
+                    self._load()
+        return self
+
+    def reload(self):
+        """ Reloads the index from disk (e.g. after build_and_save_vectorstore)."""
+        with self._lock:
+            self._load()
+        return self
+
+    def _load(self):
+        # Build the new components first and swap them in one step,
+        # so queries running during a reload keep the old ones.
+        retriever, model = load_rag_components(self.faiss_folder)
+        symptoms_retriever, symptoms_model = setup_rag_components()
+        # Chapter shards are used when they have been built (chapter_shards.build_chapter_shards)
+        def flat_search(query, k):
+            return retriever.invoke(query, k=k)
+
+        sharded = ShardedRetriever(fallback=flat_search) if available_shards() else None
+
+        def route(query, chapters=None, diagnosis=None):
+            # Chapter shards routed once for both searches; without shards only explicit chapters
+            return sharded.route(query, chapters, diagnosis) if sharded is not None else chapters
+
+        def vector_search(query, k, chapters=None):
+            if sharded is not None and chapters:
+                return sharded.search(query, k=k, chapters=chapters)
+            return flat_search(query, k)
+
+        # Lexical (BM25) index of the same chunks, searched alongside the vectors
+        bm25 = BM25Index.for_vectorstore(retriever.vectorstore, self.faiss_folder)
+        self._hybrid = HybridRetriever(vector_search, bm25, route=route)
+        self._sharded = sharded
+        self._symptoms_retriever, self._symptoms_model = symptoms_retriever, symptoms_model
+        # find_task_prompt answers as a TaskList object; "nostream" keeps its raw JSON out of the chat stream
+        self._task_list_model = model.with_structured_output(TaskList).with_config(tags=["nostream"])
+        self._retriever, self._model = retriever, model
+
+    # --------------------------
+    # Components
+    # --------------------------
+    @property
+    def retriever(self):
+        self.warm_up()
+        return self._retriever
+
+    @property
+    def vectorstore(self):
+        return self.retriever.vectorstore
+
+    @property
+    def model(self):
+        self.warm_up()
+        return self._model
+
+    @property
+    def task_list_model(self):
+        self.warm_up()
+        return self._task_list_model
+
+    @property
+    def symptoms_retriever(self):
+        self.warm_up()
+        return self._symptoms_retriever
+
+    @property
+    def symptoms_model(self):
+        self.warm_up()
+        return self._symptoms_model
+
+    def retrieve(self, query: str, k: int = 4, chapters=None, diagnosis: str = None) -> list:
+        """
+        Returns the k most relevant MPP chunks for `query`.
+
+        The vector search (FAISS) and a BM25 search run in parallel and are
+        fused with reciprocal-rank fusion. With chapter shards, the vector side
+        only searches the chapters routed from `chapters`, the query or the
+        `diagnosis` text; otherwise (or when nothing is routed) the flat index is used.
+        """
+        self.warm_up()
+        return self._hybrid.search(query, k=k, chapters=chapters, diagnosis=diagnosis)
+
+
+# --------------------------
+# Process singleton
+# --------------------------
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_rag_engine() -> RAGEngine:
+    """ Returns the process-wide RAGEngine (created on first use, not loaded)."""
+    global _ENGINE
+    if _ENGINE is None:
+        with _ENGINE_LOCK:
+            if _ENGINE is None:
+                _ENGINE = RAGEngine()
+    return _ENGINE
@@ -3,27 +3,23 @@ import streamlit as st
 
 # System & OS Environment
 import os
+import uuid
 from dotenv import load_dotenv
-from dataclasses import dataclass
-
-# Langchain libraries & Tools
-from langchain.tools import tool
-from langchain_openai import ChatOpenAI
-from langchain.agents import create_agent
-from langgraph.checkpoint.memory import InMemorySaver
-#from langchain.agents.structured_output import ToolStrategy
 
 # Self-made libraries, prompts and Auxiliary Functions
-from symptoms_RAG import setup_rag_components
-from find_tasks_efficient import load_rag_components, USER_WELCOME, extract_task_list
-from prompts.tech_prompts import diagnose_prompt, ATA_chapters
-from prompts.tech_prompts import find_task_prompt, SYSTEM_PROMPT
+from find_tasks_efficient import USER_WELCOME
+from rag_engine import get_rag_engine
+from task_index import get_task_index
+from task_graph import get_task_graph
+from prompts.tech_prompts import ATA_chapters
 import sqlite3
 from database.models import init_db
 
-from AUX.auxiliary_functions import gradient_text_html, find_pdf_from_task_numbers, save_history
+from AUX.auxiliary_functions import gradient_text_html, save_history
 from AUX.auxiliary_functions import get_all_users, load_history
-import time
+from agent_factory import get_maintenance_agent
+from package_store import get_package_store
+from page_search import get_page_search
 
 # Load environment variables
 load_dotenv()
@@ -34,130 +30,28 @@ DB_PATH = "database/maintenance.db"
 #init_db(DB_PATH)
 
 
-@st.cache_data
-def call_agent(maintenance_query: str):
-
-    # --------------------------
-    # Context Schema
-    # --------------------------
-    @dataclass
-    class Context:
-        user_id: str
-
-    # --------------------------
-    # RAG LLM Tools
-    #---------------------------
-
-    # Find tasks (RAG tool)
-    @tool
-    def find_tasks(components: str) -> str:
-        """ finds tasks for systems or components responsible for the failure."""
-        print("\nSearch Tasks RAG tool chosen. Thinking...\n")
-
-        # ---- Use only once to create and load vectorstore (e.g. with new manual version)
-        # build_and_save_vectorstore(PDF_FILES)
-
-        # --- Use already saved vector embeddings
-        retriever, model_tasks = load_rag_components()
-
-        component_system = components
-        if component_system.lower() == "none":
-            return "Thank you for using AI_AMTMan.\nHasta la vista baby...!"
-        print("Thinking...")
-
-        # Retrieve of stored docs and Prompt Template
-        retrieved_docs2 = retriever.invoke(component_system, k=4)
-        context = "\n\n---".join(doc.page_content for doc in retrieved_docs2)
-        prompt_template = find_task_prompt(component_system, context)
-
-        # Invoking of response
-        response_tasks = model.invoke(prompt_template)
-        tasks_to_pdf = extract_task_list(response_tasks.content)
-        find_pdf_from_task_numbers(tasks_to_pdf)
-        return response_tasks.content
-
-
-    # Symptoms diagnostic (RAG tool)
-    @tool
-    def symptoms_rag(symptoms_user: str) -> str:
-        """
-        Use the symptoms_user to determine the most likely cause of the problem.
-        """
-        # ----- Offline RAG components setup (file reading, splitting, embedding)
-        retriever_srag, model_rag = setup_rag_components()
-
-        # ----- Online (Retrieve, Augment, Generate)
-        user_question = symptoms_user
-        if user_question.lower() == "none":
-            return "Thank you for using AI_AMTMan.\nHasta la vista baby...!"
-        print("Diagnostics RAG tool chosen. Thinking...")
-        # 1. Retrieve
-        retrieved_docs_srag = retriever_srag.invoke(user_question)
-        context_srag = "\n\n".join([doc.page_content for doc in retrieved_docs_srag])
-
-        # 2. Augment
-        prompt_template_srag = diagnose_prompt(user_question, context_srag)
-
-        # 3. Generate response
-        rag_response = model_rag.invoke(prompt_template_srag)
-        print(f"\nAnswer: \n {rag_response.content}")
-
-        return f"\nAnswer: \n {rag_response.content}"
-
-
-    # --------------------------
-    # Auxiliary Tools in: PDF.auxiliary_functions
-    #---------------------------
-
-
-    # --------------------------
-    # AI Model parameter definition
-    # --------------------------
-    model = ChatOpenAI(
-        api_key=API_KEY,
-        temperature=0,
-        model="gpt-5-mini",
-        reasoning_effort="low"
-    )
-
-    # --------------------------
-    # MEMORY
-    # --------------------------
-    checkpointer = InMemorySaver()
-
-    # --------------------------
-    # AGENT CREATION
-    # --------------------------
-    agent = create_agent(
-        model=model,
-        system_prompt=SYSTEM_PROMPT,
-        tools=[find_tasks, symptoms_rag],
-        context_schema=Context,
-        checkpointer=checkpointer
-    )
-
-    config = {"configurable": {"thread_id": "1"}}
+@st.cache_resource
+def rag_engine():
+    """ Process-wide RAG engine, warmed up once and shared by all sessions."""
+    return get_rag_engine().warm_up()
 
-    #--------------------
-    # AGENT INVOCATION
-    #--------------------
 
-    response = agent.invoke(
-        {"messages": [{"role": "user", "content": maintenance_query}]},
-        config=config,
-        context=Context(user_id="1")
-    )
-    # checkpointer history
-    history = checkpointer.get(config)
-
-    # Return the assistant final message (response) or the history
-    return history
-    #return response
+@st.cache_resource
+def maintenance_agent():
+    """ Agent graph, tools and model clients, compiled once and shared by all sessions."""
+    return get_maintenance_agent()
 
 
 # ----------------------------
 # STREAMLIT
 # ---------------------------
+# Warm up the RAG engine and the task index at startup (no-op after the first session)
+rag_engine()
+get_task_index()
+get_page_search()
+get_task_graph()
+maintenance_agent()
+
 # Streamlit Element Config
 st.logo("/Users/fernandocuriel/PycharmProjects/RAG/XML/RWS logo.png", size="large")
 #st.title(":blue[AI Aircraft Maintenance Agent]")
@@ -200,7 +94,9 @@ users = get_all_users(DB_PATH)
 if users:
     selected_user = st.sidebar.selectbox(
         "Select a user",
-        users
+        users,
+        key="user_choice",
+        on_change=lambda: st.session_state.update(selected_user=st.session_state.user_choice)
     )
 
     if st.sidebar.button("Load History"):
@@ -209,25 +105,33 @@ if users:
         st.session_state["loaded_history"] = history_rows
         st.session_state["selected_user"] = selected_user
 else:
+    selected_user = None
     st.sidebar.info("No users found yet.")
 
+# Package folder in AMM_EXTRACTED: the user explicitly chosen or loaded, else this browser session's
+# (the selectbox default is the same first user in every browser)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = f"session-{uuid.uuid4().hex[:12]}"
+package_owner = st.session_state.get("selected_user") or st.session_state.session_id
+
 
 # Sidebar control
 hide_ATA = st.sidebar.checkbox("*Show ATA Chapters* ")
 hide_manual = st.checkbox("Instructions and Query Examples")
 hide_directory = st.sidebar.checkbox("*Show saved PDF tasks files*")
-contents = os.listdir('./PDF/AMM_EXTRACTED')
+package_store = get_package_store()
 
 # Sidebar content
 with st.sidebar:
     if hide_ATA:
         st.sidebar.write(ATA_chapters)
     if hide_directory:
-        st.sidebar.write(":grey[*Saved Files in:*]")
+        package_name = os.path.basename(package_store.package_dir(package_owner))
+        st.sidebar.write(f":grey[*Saved Files in:* ./AMM_EXTRACTED/{package_name}]")
         st.sidebar.write(":orange[==================================]")
-        #st.sidebar.write(contents)
-        for index in contents:
-            st.sidebar.write("./AMM_EXTRACTED/", f":small[:grey[{index}-*.PDF]]")
+        # From the package manifest (no directory listing on every rerun)
+        for file_name in package_store.files(package_owner):
+            st.sidebar.write(f":small[:grey[{file_name}]]")
 
         st.sidebar.write(":orange[==================================]")
 
@@ -250,26 +154,56 @@ for message in st.session_state.messages:
     with st.chat_message(message["role"]):
         st.write(message["content"])
 
+# Download of the last work package(s)
+for package_path in st.session_state.get("work_packages", []):
+    if os.path.isfile(package_path):
+        with open(package_path, "rb") as package_file:
+            st.download_button(f"Download work package {os.path.basename(package_path)}", package_file,
+                               file_name=os.path.basename(package_path), mime="application/pdf",
+                               key=package_path, on_click=package_store.touch, args=(package_owner,))
 
 
 
 if prompt := st.chat_input("Please enter your maintenance query:"):
-    with st.spinner("Choosing Tools...", show_time=False):
-        time.sleep(2)
     st.session_state.messages.append({"role": "user", "content": prompt})
-
-    # Run Agent and show its response
-    agent_history = call_agent(prompt)
-    channel_messages = agent_history["channel_values"]["messages"]
+    with st.chat_message("user"):
+        st.write(prompt)
+
+    # No user selected: history is kept under the session's package owner
+    user_id = selected_user or package_owner
+
+    # Run Agent and stream its response (tool choice, model tokens and tool results as they arrive)
+    with st.chat_message("assistant"):
+        status = st.status("Choosing Tools...")
+        output = st.empty()
+        streamed = ""
+        tool_tokens = ""        # text streamed since the last tool call (the tool's own model output)
+        channel_messages = []
+        for kind, payload in maintenance_agent().stream(prompt, user_id, package_owner):
+            if kind == "tool_call":
+                status.update(label=f"Running {payload}...")
+                streamed += f"\n\n**[{payload}]**\n\n"
+                tool_tokens = ""
+            elif kind == "token":
+                streamed += payload
+                tool_tokens += payload
+            elif kind == "tool_result":
+                name, content = payload
+                status.update(label=f"{name} done")
+                # Skip results already streamed token by token (e.g. symptoms_rag adds an "Answer:" prefix)
+                if not tool_tokens.strip() or tool_tokens.strip() not in content:
+                    streamed += f"\n\n{content}\n\n"
+                tool_tokens = ""
+            elif kind == "done":
+                channel_messages, st.session_state.work_packages = payload
+            output.markdown(streamed)
+        status.update(label="Done", state="complete")
     for msg in channel_messages:
         st.session_state.messages.append({"role": "assistant",
                                           "content": f"""[{msg.type.upper()}]message
                                           \n\tTool call: [ {msg.name} ]\n:orange[{msg.content}]"""})
 
     # Save history of the user conversation (timestamped)
-    #user_id = "3"
-    user_id = selected_user
-
     save_history(
         user_id=user_id,
         history=channel_messages
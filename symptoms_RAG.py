@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 from langchain_community.document_loaders import TextLoader, PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_openai import ChatOpenAI
+from embedding_cache import CachedEmbeddings
+from file_utils import file_md5
 
 # Imports diagnosis prompt
 from prompts.tech_prompts import diagnose_prompt
@@ -17,27 +19,64 @@ API_KEY = os.getenv("OPENAI_API_KEY")
 XML_PATH = "XML/"
 ATA_SYSTEMS_FILE = "ADM_AMM_1285_TREE.xml"
 
+SYMPTOMS_FAISS_FOLDER = "faiss_symptoms_index"  # folder where the diagnosis FAISS is stored
+SOURCE_HASH_FILE = "source.md5"                 # MD5 of the ATA tree XML the index was built from
 
-def setup_rag_components():
-    # Offline Phase
+
+def stored_source_hash(faiss_folder=SYMPTOMS_FAISS_FOLDER):
+    """ Hash saved next to the diagnosis index, or None if there is no index yet."""
+    hash_path = os.path.join(faiss_folder, SOURCE_HASH_FILE)
+    if not os.path.isfile(hash_path):
+        return None
+    with open(hash_path) as f:
+        return f.read().strip()
+
+
+# 1. Build and save diagnosis vectorstore (needs to be run only when the ATA tree XML changes)
+
+def build_and_save_symptoms_index(faiss_folder=SYMPTOMS_FAISS_FOLDER):
+    source_path = XML_PATH + ATA_SYSTEMS_FILE
 
     # 1. Load
-    loader = TextLoader(XML_PATH + ATA_SYSTEMS_FILE)
+    loader = TextLoader(source_path)
     docs = loader.load()
-    #print(f"Loaded {len(docs)} documents!")
 
     # 2. Split
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1500, chunk_overlap=200)
     chunks = text_splitter.split_documents(docs)
-    #print(f"Document split into {len(chunks)} chunks!")
+    print(f"ATA tree split into {len(chunks)} chunks.")
 
     # 3. Embed & 4. Store
-    #print("Creating vector store")
     vectorstore = FAISS.from_documents(documents=chunks,
-                                       embedding=OpenAIEmbeddings(
-                                           model="text-embedding-3-small",
-                                           api_key=API_KEY))
-    #print("Vector store created successfully")
+                                       embedding=CachedEmbeddings())
+
+    # Save to disk, the hash is written last so a half-saved index is rebuilt
+    vectorstore.save_local(faiss_folder)
+    with open(os.path.join(faiss_folder, SOURCE_HASH_FILE), "w") as f:
+        f.write(file_md5(source_path))
+    print("Diagnosis FAISS saved successfully!")
+
+    return vectorstore
+
+
+# 2. Load RAG components (rebuilds the index only when the source XML hash changed)
+
+def load_symptoms_vectorstore(faiss_folder=SYMPTOMS_FAISS_FOLDER):
+    if stored_source_hash(faiss_folder) != file_md5(XML_PATH + ATA_SYSTEMS_FILE):
+        print("Diagnosis index missing or outdated. Rebuilding...")
+        return build_and_save_symptoms_index(faiss_folder)
+
+    embeddings = CachedEmbeddings()
+    return FAISS.load_local(
+        faiss_folder,
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
+
+
+def setup_rag_components():
+    # Offline Phase (persisted index, see build_and_save_symptoms_index)
+    vectorstore = load_symptoms_vectorstore()
 
     model = ChatOpenAI(api_key=API_KEY, model="gpt-5-mini")
 
@@ -76,6 +115,10 @@ def main():
     print(symptoms_rag())
 
 if __name__ == "__main__":
+
+    # -- Use only to force a rebuild of the diagnosis index
+    #build_and_save_symptoms_index()
+
     while True:
         response = input("\nTo continue press <ENTER>. Or... Press n/N to finish.")
         if response.lower() == "n":
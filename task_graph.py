@@ -0,0 +1,217 @@
+# Directed graph of the task cross-references in the MPP manual, with memoized dependency closure
+import os
+import re
+import json
+import threading
+from functools import lru_cache
+
+from mpp_xml import MPP_ROOT, chapter_xml_files
+from mpp_splitter import strip_page_boilerplate, TASK_HEADING
+from task_index import INDEX_FOLDER, find_codes, _page_texts
+
+TASK_GRAPH_FILE = "task_graph.json"
+# "B. References" table of a task: its prerequisite tasks and pageblocks (ends at the next lettered section)
+REFERENCES_TABLE = re.compile(r"\bReferences\s+REFERENCE DESIGNATION(.*?)(?=\b[C-Z]\.\s+[A-Z][a-z]|$)", re.DOTALL)
+# Function code of a task (3rd group) -> function codes of the tasks that follow it,
+# e.g. removal 21-51-01-000-801-A is followed by installation 21-51-01-400-801-A
+FOLLOW_UP_FUNCTIONS = {"000": ("400",)}
+# Reference levels followed by bundle(): the full closure of a task reaches hundreds of tasks
+# (engine runs, pressurizations, ...); two levels give a median of 8 tasks but up to 566
+BUNDLE_DEPTH = 2
+# Related tasks added by bundle() besides the requested ones (direct references and follow-ups first)
+BUNDLE_MAX_RELATED = 15
+
+
+# --------------------------
+# Build (offline)
+# --------------------------
+def task_references(xml_path: str) -> dict:
+    """
+    {task: [codes in its References table]} for the tasks of one MPP XML file.
+    "Refer to ..." notes inside the procedure steps are not prerequisites and are left out.
+    """
+    text = " ".join(strip_page_boilerplate(page) for _, page in _page_texts(xml_path))
+    headings = list(TASK_HEADING.finditer(text))
+    references = {}
+    for i, heading in enumerate(headings):
+        task = heading.group(1)
+        end = headings[i + 1].start() if i + 1 < len(headings) else len(text)
+        table = REFERENCES_TABLE.search(text, heading.end(), end)
+        codes = [code for code in find_codes(table.group(1)) if code != task] if table else []
+        references.setdefault(task, [])
+        references[task].extend(code for code in codes if code not in references[task])
+    return references
+
+
+def build_task_graph(root: str = MPP_ROOT, index_folder: str = INDEX_FOLDER) -> dict:
+    """ Builds {task: [referenced tasks / pageblocks]} over every chapter and saves it as JSON."""
+    graph = {}
+    for xml_path in chapter_xml_files(root=root):
+        if os.path.basename(xml_path).startswith("MPP"):
+            for task, codes in task_references(xml_path).items():
+                graph.setdefault(task, [])
+                graph[task].extend(code for code in codes if code not in graph[task])
+
+    os.makedirs(index_folder, exist_ok=True)
+    with open(os.path.join(index_folder, TASK_GRAPH_FILE), "w") as f:
+        json.dump(graph, f)
+    edges = sum(len(codes) for codes in graph.values())
+    print(f"Task graph: {len(graph)} tasks, {edges} references saved.")
+    return graph
+
+
+# --------------------------
+# Queries
+# --------------------------
+class TaskGraph:
+    """
+    Adjacency lists of the task references ("references": task -> codes it
+    refers to, "referenced_by": the reverse) with memoized closures.
+
+    prerequisites(task, depth) is every task or pageblock reachable through
+    at most `depth` reference levels (None = full closure), deepest first;
+    follow_ups(task) are the tasks that complete it (removal -> installation)
+    with their own prerequisites. Closures are memoized per (task, depth).
+    """
+
+    def __init__(self, references: dict):
+        self.references = references
+        self.referenced_by = {}
+        for task, codes in references.items():
+            for code in codes:
+                self.referenced_by.setdefault(code, []).append(task)
+
+    @classmethod
+    def load(cls, index_folder: str = INDEX_FOLDER):
+        graph_path = os.path.join(index_folder, TASK_GRAPH_FILE)
+        if not os.path.isfile(graph_path):
+            return cls(build_task_graph(index_folder=index_folder))
+        with open(graph_path) as f:
+            return cls(json.load(f))
+
+    @lru_cache(maxsize=16384)
+    def prerequisites(self, task: str, depth: int = None) -> tuple:
+        """ Transitive closure of the references of `task` in dependency order (deepest first)."""
+        if depth is not None:
+            # Bounded: built from the memoized closures of the referenced tasks
+            if depth <= 0:
+                return ()
+            order = []
+            for child in self.references.get(task, ()):
+                order.extend(self.prerequisites(child, depth - 1))
+                order.append(child)
+            return tuple(code for code in dict.fromkeys(order) if code != task)
+
+        order, seen = [], {task}
+        stack = [(task, iter(self.references.get(task, ())))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                if node != task:
+                    order.append(node)
+            elif child not in seen:
+                seen.add(child)
+                stack.append((child, iter(self.references.get(child, ()))))
+        return tuple(order)
+
+    def follow_up_tasks(self, task: str) -> tuple:
+        """ Tasks completing `task`, e.g. its installation after a removal."""
+        parts = task.split("-")
+        if len(parts) != 6:
+            return ()
+        follow_ups = ("-".join(parts[:3] + [function] + parts[4:]) for function in FOLLOW_UP_FUNCTIONS.get(parts[3], ()))
+        return tuple(code for code in follow_ups if code in self.references)
+
+    @lru_cache(maxsize=8192)
+    def follow_ups(self, task: str, depth: int = None) -> tuple:
+        """ Tasks completing `task` (e.g. its installation after a removal) and their prerequisites."""
+        tasks = []
+        for follow_up in self.follow_up_tasks(task):
+            tasks.extend(self.prerequisites(follow_up, depth))
+            tasks.append(follow_up)
+        return tuple(dict.fromkeys(tasks))
+
+    @lru_cache(maxsize=8192)
+    def dependents(self, code: str) -> tuple:
+        """ Every task that refers to `code`, directly or through other tasks."""
+        found, stack = [], [code]
+        seen = {code}
+        while stack:
+            for task in self.referenced_by.get(stack.pop(), ()):
+                if task not in seen:
+                    seen.add(task)
+                    found.append(task)
+                    stack.append(task)
+        return tuple(found)
+
+    def _prerequisites_without(self, task: str, depth: int, excluded: set) -> tuple:
+        """ prerequisites(task, depth) not followed through the `excluded` references of `task`."""
+        if depth is not None and depth <= 0:
+            return ()
+        order = []
+        for child in self.references.get(task, ()):
+            if child not in excluded:
+                order.extend(self.prerequisites(child, None if depth is None else depth - 1))
+                order.append(child)
+        return tuple(code for code in dict.fromkeys(order) if code != task)
+
+    def bundle(self, tasks: list, depth: int = BUNDLE_DEPTH, max_related: int = BUNDLE_MAX_RELATED) -> dict:
+        """
+        Requested tasks with their prerequisites and follow-ups in work order:
+        {code: "prerequisite" | "requested" | "follow-up"}. Prerequisites come before
+        their task and follow-ups after it; at most `max_related` related tasks are
+        kept, direct references and follow-ups before the deeper levels.
+        """
+        requested = list(dict.fromkeys(tasks))
+        completing = {code for task in requested for code in self.follow_up_tasks(task)}
+        # A removal's references can lead to its own installation: that one (and what is only
+        # reached through it) follows the task
+        excluded = set(requested) | completing
+        prerequisites = {task: [code for code in self._prerequisites_without(task, depth, excluded)
+                                if code not in excluded]
+                         for task in requested}
+        # Follow-ups that were requested themselves get their prerequisites as a requested task
+        follow_ups = {task: [code for follow_up in self.follow_up_tasks(task) if follow_up not in requested
+                             for code in self.prerequisites(follow_up, depth) + (follow_up,)]
+                      for task in requested}
+
+        # Related tasks by priority: direct references, follow-up tasks, then the deeper levels
+        candidates = [code for task in requested for code in self.references.get(task, ())]
+        candidates += [code for task in requested for code in self.follow_up_tasks(task)]
+        candidates += [code for task in requested for code in prerequisites[task] + follow_ups[task]]
+        related = [code for code in dict.fromkeys(candidates) if code not in requested]
+        kept = set(related[:max_related])
+
+        roles = {}
+        for task in requested:
+            for code in prerequisites[task]:
+                if code in kept:
+                    roles.setdefault(code, "prerequisite")
+            roles[task] = "requested"
+            for code in follow_ups[task]:
+                if code in kept:
+                    roles.setdefault(code, "follow-up")
+        return roles
+
+
+_GRAPH = None
+_GRAPH_LOCK = threading.Lock()
+
+
+def get_task_graph() -> TaskGraph:
+    """ Process-wide TaskGraph, loaded (or built) on first use."""
+    global _GRAPH
+    if _GRAPH is None:
+        with _GRAPH_LOCK:
+            if _GRAPH is None:
+                _GRAPH = TaskGraph.load()
+    return _GRAPH
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    build_task_graph()
@@ -0,0 +1,231 @@
+# Exact task-number / pageblock index of the MPP manual (no retrieval, no LLM)
+import os
+import re
+import json
+import threading
+import xml.etree.ElementTree as ET
+
+from mpp_xml import MPP_ROOT, chapter_xml_files
+from mpp_splitter import strip_page_boilerplate, TASK_HEADING
+
+INDEX_FOLDER = "index"                       # prebuilt lookup indexes of the manual
+TASK_INDEX_FILE = "task_index.json"
+
+SEP = r"[-\s._]?"
+# Task code in any common format: "21-51-03-000-801-A", "21 51 03 000 801 A", "215103000801A",
+# "AMM TASK 21-51-03-000-801-A/400" (the /400 pageblock suffix is ignored)
+TASK_CODE = re.compile(rf"(?<![\dA-Za-z])(\d{{2}}){SEP}(\d{{2}}){SEP}(\d{{2}}){SEP}(\d{{3}}){SEP}(\d{{3}}){SEP}([A-Za-z])(?![A-Za-z\d])")
+# Pageblock reference: "21-51-03/400", "21 51 03 / 400"
+PAGEBLOCK_CODE = re.compile(rf"(?<![\d-])(\d{{2}}){SEP}(\d{{2}}){SEP}(\d{{2}})\s*/\s*(\d{{3}})(?!\d)")
+
+# One TOC line: code [CONFIG-n] status date [EFFECTIVITY: ...] followed by the title
+TOC_ENTRY = re.compile(
+    r"(?P<code>\d{2}-\d{2}-\d{2}(?:-\d{3}-\d{3}-[A-Z]|/\d{3}))"
+    r"(?: (?P<config>CONFIG-\d+))? (?P<status>[URND]) (?P<date>[A-Z][a-z]{2} ?\d{1,2}/\d{2})"
+    r"(?: EFFECTIVITY: (?P<effectivity>ACFT MODEL\(S\) (?:EMB-\d{3} ?)+|ALL))?"
+)
+TOC_NOISE = re.compile(r"TABLE OF CONTENTS|PAGEBLOCK REVISION REVISION TASK STATUS DATE|Revision Status:.*$")
+
+
+# --------------------------
+# Code normalization
+# --------------------------
+def find_codes(text: str) -> list:
+    """ Canonical task codes and pageblocks found in `text`, in order of appearance."""
+    codes = []
+    for m in TASK_CODE.finditer(text):
+        codes.append((m.start(), "-".join(m.groups()[:5]) + "-" + m.group(6).upper()))
+    masked = TASK_CODE.sub(lambda m: " " * len(m.group()), text)
+    for m in PAGEBLOCK_CODE.finditer(masked):
+        codes.append((m.start(), "-".join(m.groups()[:3]) + "/" + m.group(4)))
+    return list(dict.fromkeys(code for _, code in sorted(codes)))
+
+
+def normalize_code(code: str):
+    """ Canonical form of a single task code or pageblock, or None if it is neither."""
+    codes = find_codes(code)
+    return codes[0] if codes else None
+
+
+def pageblock_file(pageblock: str, config=None) -> str:
+    """ Manual PDF of a pageblock, e.g. ("21-20-00/700", "CONFIG-2") -> .../MPP1285_21-20-00-07-2.PDF"""
+    section, block = pageblock.split("/")
+    variant = config.split("-")[1] if config else "1"
+    return f"AMM_PART2_1285/CHAPTER_{section[:2]}/MPP1285_{section}-{int(block) // 100:02d}-{variant}.PDF"
+
+
+# --------------------------
+# Build (offline)
+# --------------------------
+def _page_texts(xml_path: str):
+    """ Page texts of an MPP XML file (stops quietly at a truncated file's end)."""
+    with open(xml_path, "rb") as f:
+        try:
+            for _, elem in ET.iterparse(f):
+                if elem.tag == "page":
+                    yield int(elem.get("number")), elem.findtext("data") or ""
+                    elem.clear()
+        except ET.ParseError:
+            return
+
+
+def parse_toc(xml_path: str) -> list:
+    """ Entries (pageblocks and tasks) of one chapter TOC XML, in manual order."""
+    text = " ".join(TOC_NOISE.sub(" ", strip_page_boilerplate(page)) for _, page in _page_texts(xml_path))
+    text = re.sub(r"(?<=[A-Z])-\s{2,}(?=[A-Z])", "", text)    # re-join words hyphenated at line ends
+    text = re.sub(r"(?<=[A-Z])/\s+(?=[A-Z])", "/", text)       # "INSPECTION/ CHECK"
+    text = " ".join(text.split())
+
+    matches = list(TOC_ENTRY.finditer(text))
+    entries = []
+    pageblock = None
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        effectivity = m.group("effectivity")
+        entry = {
+            "code": m.group("code"),
+            "kind": "pageblock" if "/" in m.group("code") else "task",
+            "title": text[m.end():end].strip(),
+            "status": m.group("status"),
+            "date": m.group("date"),
+            "config": m.group("config"),
+            "effectivity": effectivity.replace("ACFT MODEL(S)", "").strip() if effectivity else None,
+        }
+        if entry["kind"] == "pageblock":
+            pageblock = entry
+            entry["pageblock"] = entry["code"]
+        else:
+            entry["pageblock"] = pageblock["code"] if pageblock else None
+            entry["config"] = entry["config"] or (pageblock["config"] if pageblock else None)
+        entry["pdf"] = pageblock_file(entry["pageblock"], entry["config"]) if entry["pageblock"] else None
+        entries.append(entry)
+    return entries
+
+
+def scan_task_pages(xml_path: str) -> dict:
+    """
+    Page range of every task whose procedure is in this task XML file:
+    {task_number: (first_page, last_page)}, 1-based and inclusive.
+    A task starts at its "TASK <number>" heading and runs (figures included)
+    until the page before the next heading, or to the end of the file.
+    """
+    ranges = {}
+    current = None
+    last_page = 0
+    for number, page in _page_texts(xml_path):
+        for heading in TASK_HEADING.finditer(page):
+            if current is not None:
+                # heading at the top of the page (after the manual header) closes the task on the page before
+                end = number - 1 if heading.start() < 80 else number
+                ranges[current] = (ranges[current][0], max(ranges[current][0], end))
+            current = heading.group(1)
+            ranges.setdefault(current, (number, number))
+        last_page = number
+    if current is not None:
+        ranges[current] = (ranges[current][0], last_page)
+    return ranges
+
+
+def build_task_index(root: str = MPP_ROOT, index_folder: str = INDEX_FOLDER) -> dict:
+    """ Builds {code: [entries]} from every chapter TOC and task page and saves it as JSON."""
+    index = {}
+    task_files = {}
+    for xml_path in chapter_xml_files(root=root):
+        name = os.path.basename(xml_path)
+        if name.startswith("025-") and name.endswith("-TOC.xml"):
+            for entry in parse_toc(xml_path):
+                index.setdefault(entry["code"], []).append(entry)
+        elif name.startswith("MPP"):
+            pdf = os.path.relpath(os.path.splitext(xml_path)[0] + ".PDF", os.path.dirname(root))
+            for task_number, pages in scan_task_pages(xml_path).items():
+                task_files.setdefault(task_number, {})[pdf] = pages
+
+    # Check every TOC file against the task pages; tasks missing in the TOC are added.
+    # Task entries get the page range of the task inside their PDF ("pages": [first, last]).
+    pdf_root = os.path.dirname(root)
+    for task_number, files in task_files.items():
+        entries = index.setdefault(task_number, [])
+        for entry in entries:
+            if entry["pdf"] not in files and not os.path.isfile(os.path.join(pdf_root, entry["pdf"] or "")):
+                entry["pdf"] = next(iter(files))
+        for pdf in files:
+            if not any(entry["pdf"] == pdf for entry in entries):
+                entries.append({"code": task_number, "kind": "task", "title": None, "status": None,
+                                "date": None, "config": None, "effectivity": None, "pageblock": None,
+                                "pdf": pdf})
+        for entry in entries:
+            entry["pages"] = files.get(entry["pdf"])
+
+    os.makedirs(index_folder, exist_ok=True)
+    with open(os.path.join(index_folder, TASK_INDEX_FILE), "w") as f:
+        json.dump(index, f)
+    print(f"Task index: {len(index)} task numbers and pageblocks saved.")
+    return index
+
+
+# --------------------------
+# Lookup
+# --------------------------
+class TaskIndex:
+    """ In-memory {code: [entries]} with lookups by any code format (one entry per config)."""
+
+    def __init__(self, index: dict):
+        self.index = index
+
+    @classmethod
+    def load(cls, index_folder: str = INDEX_FOLDER):
+        index_path = os.path.join(index_folder, TASK_INDEX_FILE)
+        if not os.path.isfile(index_path):
+            return cls(build_task_index(index_folder=index_folder))
+        with open(index_path) as f:
+            return cls(json.load(f))
+
+    def lookup(self, code: str) -> list:
+        canonical = normalize_code(code)
+        return self.index.get(canonical, []) if canonical else []
+
+    def known_codes(self, text: str) -> list:
+        """ Valid codes in `text` that exist in the manual."""
+        return [code for code in find_codes(text) if code in self.index]
+
+    def page_ranges(self, code: str) -> dict:
+        """ {pdf: (first_page, last_page)} of a task inside its PDF(s); {} for pageblocks or unknown pages."""
+        return {entry["pdf"]: tuple(entry["pages"]) for entry in self.lookup(code) if entry.get("pages")}
+
+
+def format_task_table(index: TaskIndex, codes: list, roles: dict = None) -> str:
+    """
+    Markdown table of the index entries for `codes` (the same table find_tasks shows);
+    with `roles` ({code: "requested" | "prerequisite" | "follow-up"}) the requested rows are in bold.
+    """
+    roles = roles or {}
+    lines = ["| Task / Pageblock | Role | Description | Config | Effectivity | Status | PDF |",
+             "|---|---|---|---|---|---|---|"]
+    for code in codes:
+        role = roles.get(code, "")
+        for entry in index.lookup(code):
+            task = f"**{entry['code']}**" if role == "requested" else entry["code"]
+            lines.append(f"| {task} | {role} | {entry['title'] or ''} | {entry['config'] or ''} | "
+                         f"{entry['effectivity'] or ''} | {entry['status'] or ''} | {entry['pdf'] or ''} |")
+    return "\n".join(lines)
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_task_index() -> TaskIndex:
+    """ Process-wide TaskIndex, loaded (or built) on first use."""
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = TaskIndex.load()
+    return _INDEX
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    build_task_index()
@@ -0,0 +1,38 @@
+from langchain_core.documents import Document
+
+import boilerplate
+from boilerplate import BoilerplateCleaner
+from task_index import find_codes
+
+HEADER = "EMBRAER 145 MAINTENANCE PLANNING MANUAL Page {page} of 12 Rev 48"
+FOOTER = "Copyright Embraer S.A. All rights reserved. See title page for details."
+
+
+def toc_page(page):
+    entries = "\n".join(f"21-{page:02d}-{n:02d}-000-801-A U Oct 30/15 REMOVAL OF THE VALVE {n}" for n in range(1, 6))
+    return Document(page_content=f"{HEADER.format(page=page)}\n{entries}\n21-{page:02d}-00/400 U Oct 30/15\n{FOOTER}")
+
+
+def test_toc_entries_survive_cleaning(monkeypatch):
+    monkeypatch.setattr(boilerplate, "_encoding", lambda: None)     # word estimate, no tiktoken download
+    docs = [toc_page(page) for page in range(1, 13)]
+    codes = [find_codes(doc.page_content) for doc in docs]
+
+    cleaner = BoilerplateCleaner()
+    cleaner.fit_clean(docs)
+
+    assert [find_codes(doc.page_content) for doc in docs] == codes
+    for doc in docs:
+        assert "Copyright" not in doc.page_content and "MAINTENANCE PLANNING" not in doc.page_content
+        assert "U Oct 30/15" in doc.page_content
+    report = cleaner.report()
+    assert report["pages"] == 12 and report["tokens_saved"] > 0
+
+
+def test_saved_cleaner_cleans_the_same_way(tmp_path):
+    docs = [toc_page(page) for page in range(1, 13)]
+    cleaner = BoilerplateCleaner().fit(docs).save(str(tmp_path))
+    loaded = BoilerplateCleaner.load(str(tmp_path))
+    text = toc_page(3).page_content
+    assert loaded.clean_text(text) == cleaner.clean_text(text)
+    assert BoilerplateCleaner.load(str(tmp_path / "missing")) is None
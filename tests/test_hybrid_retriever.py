@@ -0,0 +1,53 @@
+from langchain_core.documents import Document
+
+from hybrid_retriever import BM25Index, HybridRetriever, reciprocal_rank_fusion, tokenize
+
+
+def doc(text, source="MPP1285_21-20-00-07-1.PDF", page=1):
+    return Document(page_content=text, metadata={"source": source, "page": page})
+
+
+def test_tokenize_keeps_codes_and_part_numbers():
+    tokens = tokenize("Do task 21-20-00-100-805-A on the P/N 145-12345-001 valve")
+    assert "21-20-00-100-805-a" in tokens and "21-20-00" in tokens
+    assert "145-12345-001" in tokens
+    assert "the" not in tokens
+
+
+def test_reciprocal_rank_fusion():
+    a, b, c = doc("a", page=1), doc("b", page=2), doc("c", page=3)
+    fused = reciprocal_rank_fusion([[a, b], [b, c]])
+    # b: 1/62 + 1/61, then a: 1/61, then c: 1/62
+    assert [d.page_content for d in fused] == ["b", "a", "c"]
+
+
+def test_reciprocal_rank_fusion_merges_duplicates():
+    first, same = doc("valve", page=4), doc("valve", page=4)
+    assert len(reciprocal_rank_fusion([[first], [same]])) == 1
+
+
+def test_bm25_exact_code_and_chapter_filter():
+    docs = [doc("Remove the pack valve", "MPP1285_21-51-03-04-1.PDF"),
+            doc("Task 21-20-00-100-805-A duct test", "MPP1285_21-20-00-08-1.PDF"),
+            doc("Bleed valve removal", "MPP1285_36-11-00-04-1.PDF")]
+    bm25 = BM25Index(docs)
+    assert bm25.search("21-20-00-100-805-A", k=1)[0][0] is docs[1]
+    assert [d for d, _ in bm25.search("valve", chapters=["CHAPTER_36"])] == [docs[2]]
+
+
+def test_hybrid_search_uses_one_scope_for_both_searches():
+    docs = [doc("pack valve", "MPP1285_21-51-03-04-1.PDF"), doc("bleed valve", "MPP1285_36-11-00-04-1.PDF")]
+    scopes = []
+
+    def vector_search(query, k, chapters):
+        scopes.append(chapters)
+        return [d for d in docs if not chapters or docs.index(d) == 1]
+
+    retriever = HybridRetriever(vector_search, BM25Index(docs), route=lambda query, chapters, diagnosis: ["CHAPTER_36"])
+    assert retriever.search("valve", k=2) == [docs[1]]
+    assert scopes == [["CHAPTER_36"]]
+
+    # no routed chapter: both searches cover the whole manual
+    retriever.route = lambda query, chapters, diagnosis: []
+    assert len(retriever.search("valve", k=2)) == 2
+    assert scopes[-1] is None
@@ -0,0 +1,41 @@
+import fitz  # PyMuPDF
+
+from link_extract import extract_pdf_pages, merge_page_ranges, slim_pdf_name
+
+
+def make_pdf(path, pages):
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page {number}")
+        doc.save(str(path))
+    return str(path)
+
+
+def page_texts(path):
+    with fitz.open(path) as doc:
+        return [page.get_text().strip() for page in doc]
+
+
+def test_merge_page_ranges():
+    assert merge_page_ranges([(5, 12), (2, 4)]) == [(2, 12)]          # adjacent
+    assert merge_page_ranges([(2, 6), (4, 9), (3, 5)]) == [(2, 9)]    # overlapping and contained
+    assert merge_page_ranges([(13, 18), (1, 3)]) == [(1, 3), (13, 18)]
+    assert merge_page_ranges([(7, 7), (7, 7)]) == [(7, 7)]
+    assert merge_page_ranges([]) == []
+
+
+def test_slim_pdf_name():
+    assert slim_pdf_name("CHAPTER_21/MPP1285_21-20-00-07-1.PDF", [(13, 18)]) == "MPP1285_21-20-00-07-1_p13-18.PDF"
+    assert slim_pdf_name("MPP1285_21-20-00-07-1.PDF", [(1, 3), (9, 9)]) == "MPP1285_21-20-00-07-1_p1-3_p9.PDF"
+
+
+def test_extract_pdf_pages(tmp_path):
+    src = make_pdf(tmp_path / "MPP1285_21-20-00-07-1.PDF", 10)
+    dst = extract_pdf_pages(src, str(tmp_path / "out"), [(8, 12), (2, 3), (3, 4)])
+    assert dst.endswith("MPP1285_21-20-00-07-1_p2-4_p8-10.PDF")
+    assert page_texts(dst) == ["Page 2", "Page 3", "Page 4", "Page 8", "Page 9", "Page 10"]
+
+
+def test_extract_whole_file_returns_none(tmp_path):
+    src = make_pdf(tmp_path / "MPP1285_21-20-00-07-1.PDF", 4)
+    assert extract_pdf_pages(src, str(tmp_path / "out"), [(1, 2), (3, 9)]) is None
@@ -0,0 +1,51 @@
+import os
+import random
+
+import pytest
+
+from link_extract import extract_links_by_text
+from link_index import LinkIndex, read_toc_links, toc_path
+from task_index import find_codes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAPTER = "21"
+
+
+@pytest.fixture
+def in_root(monkeypatch):
+    # TOC paths are relative to the project root
+    monkeypatch.chdir(ROOT)
+    if not os.path.isfile(toc_path(CHAPTER)):
+        pytest.skip(f"{toc_path(CHAPTER)} not available")
+
+
+@pytest.fixture
+def link_index(in_root, tmp_path):
+    return LinkIndex(db_path=str(tmp_path / "toc_links.db"))
+
+
+def test_lookup_matches_extract_links_by_text(link_index):
+    codes = [code for visible, _ in read_toc_links(toc_path(CHAPTER)) for code in find_codes(visible)]
+    assert codes
+    for code in random.Random(0).sample(codes, min(10, len(codes))):
+        expected = list(dict.fromkeys(extract_links_by_text(toc_path(CHAPTER), [code])))
+        assert link_index.lookup(CHAPTER, [code]) == expected, code
+
+
+def test_lookup_normalizes_codes(link_index):
+    code = next(code for visible, _ in read_toc_links(toc_path(CHAPTER)) for code in find_codes(visible)
+                if "/" not in code)
+    assert link_index.lookup(CHAPTER, [code.replace("-", " ")]) == link_index.lookup(CHAPTER, [code])
+
+
+def test_unknown_task_and_chapter(link_index):
+    assert link_index.resolve(CHAPTER, ["21-99-99-999-999-Z"]) == {"21-99-99-999-999-Z": []}
+    assert link_index.lookup("99", ["99-10-00-000-801-A"]) == []
+
+
+def test_chapter_is_loaded_once(link_index, tmp_path):
+    first = link_index._chapter(CHAPTER)
+    assert link_index._chapter(CHAPTER) is first
+    # a second instance reads the stored links instead of the TOC
+    reloaded = LinkIndex(db_path=str(tmp_path / "toc_links.db"))._chapter(CHAPTER)
+    assert reloaded[1] == first[1]
@@ -0,0 +1,66 @@
+import os
+
+from package_store import PackageStore, folder_size, safe_name
+
+MB = 1024 * 1024
+
+
+def write_package(store, session_id, size, name="task.PDF"):
+    folder = store.package_dir(session_id, "CHAPTER_21")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, name)
+    with open(path, "wb") as f:
+        f.write(b"\0" * size)
+    return path
+
+
+def test_safe_name():
+    assert safe_name("../user 1") == "_user_1"
+    assert safe_name("") == "anonymous"
+
+
+def test_folder_size_skips_hardlinks_and_symlinks(tmp_path):
+    manual = tmp_path / "manual.PDF"
+    manual.write_bytes(b"\0" * 1000)
+    package = tmp_path / "package"
+    package.mkdir()
+    (package / "own.PDF").write_bytes(b"\0" * 300)
+    os.link(manual, package / "hardlink.PDF")
+    os.symlink(manual, package / "symlink.PDF")
+    assert folder_size(str(package)) == 300
+
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    clock = iter(range(1000))
+    monkeypatch.setattr("package_store.time.time", lambda: next(clock))
+    store = PackageStore(root=str(tmp_path), quota_mb=2.5)
+
+    store.record("alice", [write_package(store, "alice", MB)])
+    store.record("bob", [write_package(store, "bob", MB)])
+    store.touch("alice")                                   # bob is now the least recently used
+    store.record("carol", [write_package(store, "carol", MB)])
+
+    assert not os.path.exists(store.package_dir("bob"))
+    assert store.files("alice") == [os.path.join("CHAPTER_21", "task.PDF")]
+    assert store.files("bob") == []
+    assert store.total_size() == 2 * MB
+
+
+def test_package_just_written_is_kept(tmp_path):
+    store = PackageStore(root=str(tmp_path), quota_mb=1)
+    store.record("alice", [write_package(store, "alice", 2 * MB)])
+    assert os.path.exists(store.package_dir("alice"))
+
+
+def test_hardlinked_files_do_not_count_against_the_quota(tmp_path):
+    store = PackageStore(root=str(tmp_path / "extracted"), quota_mb=1)
+    manual = tmp_path / "manual.PDF"
+    manual.write_bytes(b"\0" * 2 * MB)
+    for session_id in ("alice", "bob"):
+        folder = store.package_dir(session_id, "CHAPTER_21")
+        os.makedirs(folder)
+        os.link(manual, os.path.join(folder, "task.PDF"))
+        store.record(session_id, [os.path.join(folder, "task.PDF")])
+
+    assert store.total_size() == 0
+    assert os.path.exists(store.package_dir("alice")) and os.path.exists(store.package_dir("bob"))
@@ -0,0 +1,52 @@
+import sqlite3
+
+import pytest
+
+from page_search import PageSearch, format_search_results, match_query
+
+PAGES = [
+    ("21-20-00-07-1", "21", "Air Distribution", 3, "CHAPTER_21/A.PDF", "DUCT OVHT message on the EICAS, check the duct sensor"),
+    ("21-20-00-07-1", "21", "Air Distribution", 4, "CHAPTER_21/A.PDF", "Remove the duct. Overheat sensor P/N 145-12345-001"),
+    ("36-11-00-02-1", "36", "Bleed Air", 7, "CHAPTER_36/B.PDF", "Bleed duct overheat: do task 21-20-00-100-805-A"),
+]
+
+
+@pytest.fixture
+def page_search(tmp_path):
+    db_path = str(tmp_path / "pages.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE VIRTUAL TABLE pages USING fts5 (file_id, chapter UNINDEXED, title, page UNINDEXED, "
+                     "pdf UNINDEXED, text, tokenize = 'unicode61 remove_diacritics 2')")
+        conn.executemany("INSERT INTO pages (file_id, chapter, title, page, pdf, text) VALUES (?, ?, ?, ?, ?, ?)",
+                         PAGES)
+    conn.close()
+    return PageSearch(db_path)
+
+
+def test_match_query_quotes_every_term():
+    assert match_query('P/N 145-12345 "DUCT OVHT"') == '"P/N" "145-12345" "DUCT OVHT"'
+    assert match_query("21-20-00-100-805-A") == '"21-20-00-100-805-A"'
+
+
+def test_match_query_drops_fts_syntax():
+    assert match_query('duct OR NOT* -sensor "" ( )') == '"duct" "OR" "NOT*" "-sensor"'
+    assert match_query('"unbalanced quote') == '"unbalanced" "quote"'
+    assert match_query("  - ( ) ") == ""
+
+
+def test_search_literal_strings(page_search):
+    assert [r["page"] for r in page_search.search('"DUCT OVHT"')] == [3]
+    assert [r["page"] for r in page_search.search("P/N 145-12345-001")] == [4]
+    assert [r["file_id"] for r in page_search.search("21-20-00-100-805-A")] == ["36-11-00-02-1"]
+
+
+def test_search_requires_every_word(page_search):
+    assert {r["page"] for r in page_search.search("duct overheat")} == {4, 7}
+    assert page_search.search("duct OR elephant") == []
+
+
+def test_search_chapter_and_highlight(page_search):
+    results = page_search.search("overheat", chapter=36, highlight=("[", "]"))
+    assert [r["chapter"] for r in results] == ["36"]
+    assert "[overheat]" in results[0]["snippet"]
+    assert format_search_results(page_search.search("elephant")) == "No manual pages found."
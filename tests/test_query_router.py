@@ -0,0 +1,86 @@
+import pytest
+
+from query_router import (CENTROID_MARGIN, CONFIDENCE_THRESHOLD, ROUTE_EXAMPLES, QueryRouter, centroid_confidence,
+                          log_route, router_stats, search_literals)
+
+EXAMPLES = [(tool, query) for tool, queries in ROUTE_EXAMPLES.items() for query in queries]
+
+
+class KeywordEmbeddings:
+    """ Two-dimensional embeddings: (task words, symptom words)."""
+
+    TASK_WORDS = ("valve", "gear", "removal", "inspection", "servicing", "machine", "brake", "installation")
+    SYMPTOM_WORDS = ("hot", "vibrates", "fails", "smoke", "fluctuates", "does not", "warm", "smell")
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def _vector(self, text):
+        text = text.lower()
+        return [sum(w in text for w in self.TASK_WORDS) + 0.1, sum(w in text for w in self.SYMPTOM_WORDS) + 0.1]
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("embeddings service unavailable")
+        return self._vector(text)
+
+
+@pytest.mark.parametrize("tool, query", EXAMPLES)
+def test_rules_never_pick_the_wrong_tool(tool, query):
+    decision = QueryRouter(use_embeddings=False).route(query)
+    assert decision.tool in (tool, None)
+    assert decision.argument == query
+
+
+def test_confident_rule_routes():
+    router = QueryRouter(use_embeddings=False)
+    assert router.route("air cycle machine. List only the removal tasks").confident
+    assert router.route("21-51-03-000-801-A").confident
+    assert not router.route("air cycle machine, bleed air valve").confident
+
+
+@pytest.mark.parametrize("tool, query", EXAMPLES)
+def test_centroid_routes_the_examples(tool, query):
+    decision = QueryRouter(embeddings=KeywordEmbeddings()).route(query)
+    assert decision.tool == tool
+    assert decision.confident
+
+
+def test_centroid_confidence_needs_a_clear_margin():
+    assert centroid_confidence(0.0) == 0.5
+    assert centroid_confidence(0.015) < CONFIDENCE_THRESHOLD
+    assert centroid_confidence(CENTROID_MARGIN) == pytest.approx(CONFIDENCE_THRESHOLD)
+    assert centroid_confidence(1.0) == 1.0
+    assert centroid_confidence(-1.0) == 0.0
+
+
+def test_centroid_stage_retries_after_an_error():
+    embeddings = KeywordEmbeddings(failures=1)
+    router = QueryRouter(embeddings=embeddings)
+    assert router.centroid_route("Hot air in passenger cabin.") == (None, 0.0)
+    assert router.centroid_route("Hot air in passenger cabin.")[0] == "symptoms_rag"
+
+
+def test_search_manual_gets_only_the_literal():
+    router = QueryRouter(use_embeddings=False)
+    decision = router.route('Where is "DUCT OVHT" mentioned?')
+    assert (decision.tool, decision.argument, decision.confident) == ("search_manual", '"DUCT OVHT"', True)
+    assert search_literals("P/N 145-12345-001 placard") == "145-12345-001"
+    assert not router.route("Where is the pump mentioned?").confident
+
+
+def test_router_stats(tmp_path):
+    log_path = str(tmp_path / "router_stats.jsonl")
+    router = QueryRouter(use_embeddings=False)
+    log_route("pack valve removal and installation", router.route("pack valve removal and installation"),
+              log_path=log_path)
+    log_route("main landing gear wheel and brake", router.route("main landing gear wheel and brake"),
+              llm_tool="find_tasks", llm_route_ms=800.0, log_path=log_path)
+    stats = router_stats(log_path)
+    assert (stats["queries"], stats["routed_locally"]) == (2, 1)
+    assert stats["estimated_time_saved_s"] == pytest.approx(0.8)
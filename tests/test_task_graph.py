@@ -0,0 +1,52 @@
+from task_graph import TaskGraph
+
+REMOVAL = "21-51-01-000-801-A"
+INSTALLATION = "21-51-01-400-801-A"
+REFERENCES = {
+    REMOVAL: ["21-00-00-860-801-A", "21-51-00/200", INSTALLATION],
+    INSTALLATION: ["21-00-00-860-802-A"],
+    "21-00-00-860-801-A": ["24-00-00-860-801-A"],
+    "24-00-00-860-801-A": ["24-00-00-860-901-A"],
+    "21-00-00-860-802-A": [],
+    # a task with many references (engine runs, pressurizations, ...)
+    "36-11-00-000-801-A": [f"36-{n:02d}-00-860-801-A" for n in range(40)],
+}
+
+
+def test_prerequisites_deepest_first():
+    graph = TaskGraph(REFERENCES)
+    assert graph.prerequisites("21-00-00-860-801-A") == ("24-00-00-860-901-A", "24-00-00-860-801-A")
+    assert graph.prerequisites(REMOVAL, 1) == ("21-00-00-860-801-A", "21-51-00/200", INSTALLATION)
+
+
+def test_bundle_roles_and_order():
+    roles = TaskGraph(REFERENCES).bundle([REMOVAL])
+    assert roles == {
+        "24-00-00-860-801-A": "prerequisite",
+        "21-00-00-860-801-A": "prerequisite",
+        "21-51-00/200": "prerequisite",
+        REMOVAL: "requested",
+        "21-00-00-860-802-A": "follow-up",
+        INSTALLATION: "follow-up",
+    }
+    # depth 2: the third reference level is left out
+    assert "24-00-00-860-901-A" not in roles
+
+
+def test_bundle_caps_related_tasks():
+    graph = TaskGraph(REFERENCES)
+    roles = graph.bundle(["36-11-00-000-801-A"], max_related=15)
+    assert len(roles) == 16
+    assert list(roles.values()).count("requested") == 1
+
+    # requested tasks are never cut by the cap
+    roles = graph.bundle([REMOVAL, "36-11-00-000-801-A"], max_related=2)
+    assert [code for code, role in roles.items() if role == "requested"] == [REMOVAL, "36-11-00-000-801-A"]
+    assert len(roles) == 4
+    # direct references come first
+    assert set(roles) - {REMOVAL, "36-11-00-000-801-A"} == {"21-00-00-860-801-A", "21-51-00/200"}
+
+
+def test_requested_follow_up_stays_requested():
+    roles = TaskGraph(REFERENCES).bundle([REMOVAL, INSTALLATION])
+    assert roles[INSTALLATION] == "requested"
@@ -0,0 +1,43 @@
+from task_index import TaskIndex, find_codes, normalize_code, pageblock_file
+
+
+def test_find_codes_accepts_common_formats():
+    text = "AMM TASK 21 51 03 000 801 a/400, then 215103000801A and 21-51-03/400"
+    assert find_codes(text) == ["21-51-03-000-801-A", "21-51-03/400"]
+
+
+def test_find_codes_keeps_order_of_appearance():
+    assert find_codes("36-11-00/200 before 21-20-00-100-805-A") == ["36-11-00/200", "21-20-00-100-805-A"]
+
+
+def test_find_codes_ignores_longer_numbers():
+    assert find_codes("P/N 1215103000801A9") == []
+
+
+def test_normalize_code():
+    assert normalize_code("21.51.03.000.801.a") == "21-51-03-000-801-A"
+    assert normalize_code("21 51 03 / 400") == "21-51-03/400"
+    assert normalize_code("air cycle machine") is None
+
+
+def test_pageblock_file():
+    assert pageblock_file("21-20-00/700") == "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-07-1.PDF"
+    assert pageblock_file("21-20-00/700", "CONFIG-2") == "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-07-2.PDF"
+
+
+def test_lookup_and_page_ranges():
+    index = TaskIndex({
+        "21-20-00-100-805-A": [
+            {"pdf": "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-08-1.PDF", "pages": [13, 18], "title": "Test"},
+            {"pdf": "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-08-2.PDF", "pages": [2, 5], "title": "Test"},
+        ],
+        "21-20-00/800": [{"pdf": "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-08-1.PDF", "pages": None}],
+    })
+    assert len(index.lookup("21 20 00 100 805 A")) == 2
+    assert index.lookup("21-99-99-000-801-A") == []
+    assert index.page_ranges("212000100805A") == {
+        "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-08-1.PDF": (13, 18),
+        "AMM_PART2_1285/CHAPTER_21/MPP1285_21-20-00-08-2.PDF": (2, 5),
+    }
+    assert index.page_ranges("21-20-00/800") == {}
+    assert index.known_codes("21-20-00-100-805-A and 21-99-99-000-801-A") == ["21-20-00-100-805-A"]
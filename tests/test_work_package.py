@@ -0,0 +1,33 @@
+import os
+
+import fitz  # PyMuPDF
+
+import work_package
+from task_index import TaskIndex
+
+
+def make_pdf(path, pages):
+    with fitz.open() as doc:
+        for number in range(1, pages + 1):
+            doc.new_page().insert_text((72, 72), f"Page {number}")
+        doc.save(str(path))
+    return str(path)
+
+
+def test_packages_built_in_the_same_second_get_distinct_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_package, "find_xml_for", lambda source: None)
+    monkeypatch.setattr(work_package, "get_task_index", lambda: TaskIndex({}))
+    monkeypatch.setattr(work_package.time, "strftime", lambda fmt, *args: "20260101-120000")
+    sources = [make_pdf(tmp_path / "MPP1285_21-20-00-07-1.PDF", 3), make_pdf(tmp_path / "MPP1285_21-51-03-04-1.PDF", 2)]
+    result = {"copied": sources, "tasks": {sources[0]: ["21-20-00-100-805-A"]}}
+
+    folder = str(tmp_path / "packages")
+    first = work_package.build_work_package(result, folder=folder)
+    second = work_package.build_work_package(result, folder=folder)
+
+    assert first != second
+    assert sorted(os.listdir(folder)) == sorted(os.path.basename(path) for path in (first, second))
+    with fitz.open(first) as doc:
+        assert doc.page_count == 2 + 3 + 2      # cover, index, task pages
+        assert [entry[1] for entry in doc.get_toc()] == ["Cover", "Index", "MPP1285_21-20-00-07-1.PDF",
+                                                         "21-20-00-100-805-A", "MPP1285_21-51-03-04-1.PDF"]
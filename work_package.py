@@ -0,0 +1,151 @@
+# Single work-package PDF (cover + index + task pages) streamed from the resolved task files
+import os
+import time
+import uuid
+
+import fitz  # PyMuPDF
+
+from fitz_pool import open_document
+from mpp_xml import find_xml_for, read_file_info
+from task_index import get_task_index
+
+WORK_PACKAGE_FOLDER = "PDF/WORK_PACKAGES"
+BATCH_FILES = 8                 # source files appended between two incremental saves
+INDEX_LINES_PER_PAGE = 40
+
+PAGE_WIDTH, PAGE_HEIGHT = fitz.paper_size("a4")
+MARGIN = 56
+
+
+def package_parts(result: dict) -> list:
+    """
+    Files of a find_pdf_from_task_numbers result in package order (chapter by chapter):
+    [{"path", "source", "title", "tasks"}]; slim task PDFs replace their source file.
+    """
+    parts = []
+    for chapter_result in result.get("chapters", {"": result}).values():
+        extracted = chapter_result.get("extracted", {})
+        tasks = chapter_result.get("tasks", {})
+        for source in chapter_result["copied"]:
+            xml_path = find_xml_for(source)
+            title = read_file_info(xml_path)["title"] if xml_path else None
+            parts.append({"path": extracted.get(source, source), "source": source,
+                          "title": title or os.path.basename(source), "tasks": tasks.get(source, [])})
+    return parts
+
+
+def page_count(path: str) -> int:
+    with open_document(path) as doc:
+        return doc.page_count
+
+
+# --------------------------
+# Cover and index pages
+# --------------------------
+def _index_lines(parts: list) -> list:
+    """ (text, package page) of every index line: one per file and one per requested task."""
+    task_index = get_task_index()
+    lines = []
+    for part in parts:
+        lines.append((f"{os.path.basename(part['source'])}  {part['title']}", part["start"]))
+        for task in part["tasks"]:
+            entries = task_index.lookup(task)
+            title = entries[0]["title"] if entries and entries[0]["title"] else ""
+            lines.append((f"    {task}  {title}", part["start"]))
+    return lines
+
+
+def index_page_count(parts: list) -> int:
+    lines = sum(1 + len(part["tasks"]) for part in parts)
+    return max(1, -(-lines // INDEX_LINES_PER_PAGE))
+
+
+def write_front_pages(doc, title: str, parts: list, query: str = None):
+    """ Adds the cover page and the index pages (entries point at package page numbers)."""
+    cover = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    cover.insert_text((MARGIN, 160), "AIRCRAFT MAINTENANCE WORK PACKAGE", fontsize=20, fontname="hebo")
+    cover.insert_text((MARGIN, 200), title, fontsize=14)
+    y = 240
+    if query:
+        cover.insert_textbox(fitz.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, y + 120), f"Query: {query}", fontsize=11)
+        y += 130
+    total = sum(part["pages"] for part in parts)
+    cover.insert_text((MARGIN, y), f"{len(parts)} documents, {total} task pages", fontsize=11)
+    cover.insert_text((MARGIN, y + 20), f"Generated {time.strftime('%Y-%m-%d %H:%M')}", fontsize=11)
+
+    lines = _index_lines(parts)
+    for start in range(0, max(1, len(lines)), INDEX_LINES_PER_PAGE):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((MARGIN, 60), "INDEX", fontsize=16, fontname="hebo")
+        y = 90
+        for text, package_page in lines[start:start + INDEX_LINES_PER_PAGE]:
+            page.insert_text((MARGIN, y), text[:95], fontsize=9)
+            page.insert_text((PAGE_WIDTH - MARGIN - 30, y), str(package_page), fontsize=9)
+            y += 17
+
+
+# --------------------------
+# Package builder
+# --------------------------
+def build_work_package(result: dict, output_path: str = None, title: str = None, query: str = None,
+                       folder: str = WORK_PACKAGE_FOLDER) -> str:
+    """
+    Streams the files of a find_pdf_from_task_numbers result into one PDF with a
+    cover, an index and bookmarks, and returns its path (default: a new
+    WP_<timestamp>_<id>.PDF in `folder`, unique for packages built in the same second).
+
+    Only the page counts are read up front; the pages are then appended one
+    source file at a time and the package is saved incrementally every
+    BATCH_FILES files, so memory stays bounded by one batch, not the package.
+    """
+    parts = package_parts(result)
+    if not parts:
+        raise ValueError("No task files to put in the work package.")
+
+    title = title or f"Work package {time.strftime('%Y%m%d-%H%M%S')}"
+    build_id = uuid.uuid4().hex[:8]
+    if output_path is None:
+        os.makedirs(folder, exist_ok=True)
+        output_path = os.path.join(folder, f"WP_{time.strftime('%Y%m%d-%H%M%S')}_{build_id}.PDF")
+
+    # Package page numbers (1-based) of every part, known before any page is copied
+    next_page = 2 + index_page_count(parts)
+    for part in parts:
+        part["pages"] = page_count(part["path"])
+        part["start"] = next_page
+        next_page += part["pages"]
+
+    tmp = f"{output_path}.tmp{os.getpid()}_{build_id}"   # per build: threads share the pid
+    with fitz.open() as doc:
+        write_front_pages(doc, title, parts, query)
+        doc.save(tmp, garbage=3, deflate=True)
+
+    for start in range(0, len(parts), BATCH_FILES):
+        with fitz.open(tmp) as doc:
+            for part in parts[start:start + BATCH_FILES]:
+                with open_document(part["path"]) as src:
+                    doc.insert_pdf(src)
+            doc.saveIncr()
+
+    # Bookmarks: one per file, one per requested task (all on the file's first page)
+    with fitz.open(tmp) as doc:
+        toc = [[1, "Cover", 1], [1, "Index", 2]]
+        for part in parts:
+            toc.append([1, os.path.basename(part["source"]), part["start"]])
+            toc.extend([2, task, part["start"]] for task in part["tasks"])
+        doc.set_toc(toc)
+        doc.saveIncr()
+
+    os.replace(tmp, output_path)
+    print(f"Work package: {len(parts)} files, {next_page - 1} pages -> {output_path}")
+    return output_path
+
+
+#-------------------
+# Usage
+#---------------
+if __name__ == "__main__":
+    from AUX.auxiliary_functions import find_pdf_from_task_numbers
+
+    tasks = ["21-20-00-100-805-A", "21-51-03-000-801-A", "36-11-00/200"]
+    build_work_package(find_pdf_from_task_numbers(tasks), title="Example package", query=", ".join(tasks))